@@ -1,4 +1,3 @@
-from tracemalloc import start
 import pendulum
 from argparse import ArgumentParser
 from lib.sec_edgar import SECEdgar 
@@ -28,6 +27,13 @@ if __name__ == "__main__":
                         action='store_true',
                         default=False)
     
+    args_parser.add_argument("--max-workers",
+                        help="Number of dates processed concurrently",
+                        dest='max_workers',
+                        action='store',
+                        type=int,
+                        default=2)
+    
     args = args_parser.parse_args()
     start_date = pendulum.parse(args.start_date, strict=False)
     if args.end_date:
@@ -35,6 +41,7 @@ if __name__ == "__main__":
     else:
         end_date = start_date
 
-    for date in (end_date- start_date).range('days'):
-        print(f"Processing {date.to_date_string()}")
-        SECEdgar(force=args.force).preprocess(date=date.to_date_string())
+    edgar = SECEdgar(force=args.force)
+    dates = [date.to_date_string() for date in (end_date- start_date).range('days')]
+    print(f"Processing {', '.join(dates)}")
+    edgar.process_dates(dates=dates, max_workers=args.max_workers, force=args.force)
@@ -1,3 +1,7 @@
 class Config:
     # Please obtain your own API key from https://geolocation-db.com/ and replace the value below.
-    GEOLOCATION_DB_API_KEY = ''
\ No newline at end of file
+    GEOLOCATION_DB_API_KEY = ''
+
+    # Identify yourself to the SEC as required by its fair access policy, e.g. 'Sample Company admin@sample.com'.
+    # Required: fetching the log index fails while this is empty.
+    SEC_USER_AGENT = ''
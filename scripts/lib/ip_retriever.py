@@ -1,16 +1,61 @@
-import ipaddress
-import requests
+import asyncio
+import logging
+import sqlite3
+import aiohttp
+import msgpack
 import pendulum
 import polars as pl
 from tqdm import tqdm
 import time
 import os
 from timezonefinder import TimezoneFinder
-from concurrent.futures import ProcessPoolExecutor, as_completed
 from lib.config import Config
 from lib.logging_config import get_logger
 logger = get_logger(__name__)
 
+_TF = TimezoneFinder(in_memory=True)
+
+# UTC offsets of every known timezone, taken once at import. This freezes the DST
+# offset to the run start, which is precise enough for country-level tagging.
+_TZ_REFERENCE_TIME = pendulum.now('UTC')
+_TZ_OFFSETS = {name: _TZ_REFERENCE_TIME.in_timezone(name).format('Z') for name in pendulum.timezones()}
+
+_RESULT_SCHEMA = {
+    "ip_from": pl.UInt32, "ip_to": pl.UInt32, "country_code": pl.Utf8, "country_name": pl.Utf8,
+    "region_name": pl.Utf8, "city_name": pl.Utf8, "latitude": pl.Float64, "longitude": pl.Float64,
+    "zip_code": pl.Utf8, "timezone": pl.Utf8, "geolocation_db_attempted": pl.Boolean
+}
+
+# Cached payload of a failed or empty lookup
+_EMPTY_PAYLOAD = msgpack.packb({})
+
+
+class _TokenBucket:
+    """An asyncio token bucket allowing `max_call_count` calls per `per_seconds` seconds.
+    
+    The bucket starts full so an idle client may burst up to `max_call_count` calls,
+    after which calls are released at the sustained refill rate.
+    """
+
+    def __init__(self, max_call_count: int, per_seconds: float):
+        self.capacity = max_call_count
+        self.tokens = float(max_call_count)
+        self.fill_rate = max_call_count / per_seconds
+        self.updated_at = time.monotonic()
+        self.lock = asyncio.Lock()
+
+    async def acquire(self) -> None:
+        """Wait until a token is available and consume it."""
+        async with self.lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated_at) * self.fill_rate)
+                self.updated_at = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.fill_rate)
+
 
 class IPRetriever:
     """A class to retrieve and manage IP geolocation information.
@@ -26,25 +71,55 @@ class IPRetriever:
         ip2_location_path (str): Path to the IP2Location database parquet file
         geolocation_db_api_key (str): API key for the geolocation service
         geolocation_db_url (str): URL for the geolocation API
-        MAX_WORKERS (int): Maximum number of parallel workers for API calls
+        MAX_CONCURRENT_REQUESTS (int): Maximum number of in-flight API calls
+        MAX_CONNECTIONS (int): Maximum number of pooled keep-alive connections to the API
+        REQUEST_TIMEOUT (int): Timeout in seconds for a single API call
+        MAX_RETRIES (int): Maximum number of attempts per API call
+        RETRY_BACKOFF_FACTOR (int): Base delay in seconds for exponential retry backoff
+        RETRY_STATUSES (tuple): HTTP status codes that are retried
+        RATE_LIMIT_CALLS (int): Maximum number of API calls per RATE_LIMIT_PERIOD
+        RATE_LIMIT_PERIOD (int): Length in seconds of the rate limit window
+        PROGRESS_CHUNK_SIZE (int): Number of completed lookups per progress bar update
         combined_ip_location_path (str): Path to the combined IP location database
+        ip_cache_path (str): Path to the SQLite cache of geolocation API lookups
+        IP_CACHE_TTL (int): Number of seconds a cached API lookup stays valid
+        IP_CACHE_FAILURE_TTL (int): Number of seconds a cached failed or empty lookup stays valid
+        IP_CACHE_COMMIT_SIZE (int): Number of cache writes per transaction
+        ROW_GROUP_SIZE (int): Rows per row group when writing the combined database
+        _schema_cache (dict): Parquet column names keyed by (path, mtime)
     """
     
     ip2_location_path = 'ip2_location.parquet'
     geolocation_db_api_key = Config.GEOLOCATION_DB_API_KEY
     geolocation_db_url = f"https://geolocation-db.com/json/{geolocation_db_api_key}"
-    MAX_WORKERS = 16
+    MAX_CONCURRENT_REQUESTS = 128
+    MAX_CONNECTIONS = 200
+    REQUEST_TIMEOUT = 10
+    MAX_RETRIES = 5
+    RETRY_BACKOFF_FACTOR = 1
+    RETRY_STATUSES = (500, 502, 503, 504)
+    RATE_LIMIT_CALLS = 1000
+    RATE_LIMIT_PERIOD = 60
+    PROGRESS_CHUNK_SIZE = 1024
     combined_ip_location_path = 'combined_ip_locations.parquet'
+    ip_cache_path = 'ip_cache.db'
+    IP_CACHE_TTL = 30 * 24 * 60 * 60
+    IP_CACHE_FAILURE_TTL = 60 * 60
+    IP_CACHE_COMMIT_SIZE = 1000
+    ROW_GROUP_SIZE = 1_000_000
+    _schema_cache: dict = {}
     
     def __init__(self):
         """Initialize the IPRetriever and load the combined IP location database.
         
         If the combined database doesn't exist, it creates it from the IP2Location database.
-        Adds a 'geolocation_db_attempted' column if it doesn't exist.
+        Adds a 'geolocation_db_attempted' column if it doesn't exist and stores the
+        'ip_from'/'ip_to' keys as UInt32.
+        Opens (and creates if needed) the on-disk cache of geolocation API lookups.
         """
         if os.path.exists(self.combined_ip_location_path):
             self.combined_ip_location_df = pl.scan_parquet(self.combined_ip_location_path)
-            if 'geolocation_db_attempted' not in self.combined_ip_location_df.collect_schema().names():
+            if 'geolocation_db_attempted' not in self._get_schema_names(self.combined_ip_location_path):
                 self.combined_ip_location_df = self.combined_ip_location_df.with_columns(
                     pl.lit(False).alias('geolocation_db_attempted')
                 )
@@ -52,43 +127,113 @@ class IPRetriever:
             self.combined_ip_location_df = pl.scan_parquet(self.ip2_location_path).with_columns(
                 pl.lit(False).alias('geolocation_db_attempted')
             )
+        self.combined_ip_location_df = self.combined_ip_location_df.with_columns(
+            pl.col('ip_from').cast(pl.UInt32),
+            pl.col('ip_to').cast(pl.UInt32)
+        )
+
+        self.ip_cache = sqlite3.connect(self.ip_cache_path, check_same_thread=False)
+        self.ip_cache.execute(
+            "CREATE TABLE IF NOT EXISTS ip_cache (ip_int INTEGER PRIMARY KEY, ts INTEGER, payload BLOB)"
+        )
+        self.ip_cache.commit()
+
+    @classmethod
+    def _get_schema_names(cls, path: str) -> set:
+        """Return the column names of a parquet file, reading its footer only when it changed.
+        
+        Args:
+            path (str): Path to the parquet file
+            
+        Returns:
+            set: Column names of the file
+        """
+        key = (path, os.path.getmtime(path))
+        if key not in cls._schema_cache:
+            cls._schema_cache[key] = set(pl.scan_parquet(path).collect_schema().names())
+        return cls._schema_cache[key]
 
-    def get_ip_location_from_geolocation_db(self, ip: str) -> dict:
+    def _get_cached_location(self, ip_int: int):
+        """Return a cached geolocation API lookup for an IP if it is younger than its TTL.
+        
+        Failed or empty lookups expire after IP_CACHE_FAILURE_TTL, all others after IP_CACHE_TTL.
+        
+        Args:
+            ip_int (int): Integer form of the IP address
+            
+        Returns:
+            dict: The cached lookup result, or None on a cache miss
+        """
+        now = int(time.time())
+        row = self.ip_cache.execute(
+            "SELECT payload FROM ip_cache WHERE ip_int=? AND ts>? AND (payload!=? OR ts>?)",
+            (ip_int, now - self.IP_CACHE_TTL, _EMPTY_PAYLOAD, now - self.IP_CACHE_FAILURE_TTL)
+        ).fetchone()
+        if row is None:
+            return None
+        return msgpack.unpackb(row[0])
+
+    def _cache_locations(self, rows: list) -> None:
+        """Store geolocation API lookups in the on-disk cache.
+        
+        Args:
+            rows (list): List of (ip_int, result) tuples. Failed lookups are stored
+                         as empty dicts so they are not retried until IP_CACHE_FAILURE_TTL expires.
+        """
+        ts = int(time.time())
+        for i in range(0, len(rows), self.IP_CACHE_COMMIT_SIZE):
+            self.ip_cache.executemany(
+                "INSERT OR REPLACE INTO ip_cache (ip_int, ts, payload) VALUES (?, ?, ?)",
+                [(ip_int, ts, msgpack.packb(result)) for ip_int, result in rows[i:i + self.IP_CACHE_COMMIT_SIZE]]
+            )
+            self.ip_cache.commit()
+
+    async def get_ip_location_from_geolocation_db(self, session: aiohttp.ClientSession, rate_limiter: _TokenBucket, ip: str) -> dict:
         """Fetch IP geolocation details from the external API.
         
+        Rate-limited responses (HTTP 429) are retried after the server's Retry-After
+        delay, or after the exponential backoff if the server sends none.
+        
         Args:
+            session (aiohttp.ClientSession): Shared HTTP session used for the request
+            rate_limiter (_TokenBucket): Shared rate limiter for the API
             ip (str): IP address to look up
             
         Returns:
             dict: Dictionary containing geolocation information for the IP, or None if lookup fails.
-                 Keys include: ip_from, ip_to, country_code, country_name, region_name,
-                 city_name, latitude, longitude, zip_code, timezone.
+                 Keys include: country_code, country_name, region_name, city_name,
+                 latitude, longitude, zip_code, timezone.
         """
-        for attempt in range(5):
+        for attempt in range(self.MAX_RETRIES):
+            await rate_limiter.acquire()
             try:
-                response = requests.get(f'{self.geolocation_db_url}/{ip}')
-                if response.status_code == 200:
-                    break
+                async with session.get(f'{self.geolocation_db_url}/{ip}') as response:
+                    if response.status == 200:
+                        data = await response.json(content_type=None)
+                        break
+                    if response.status == 429:
+                        retry_after = response.headers.get('Retry-After', '')
+                        if retry_after.isdigit():
+                            await asyncio.sleep(int(retry_after))
+                            continue
+                    elif response.status not in self.RETRY_STATUSES:
+                        return None
             except Exception as e:
-                logger.error(f"get_ip_from_ip2location - Error processing IP {ip}: {str(e)}")
-                if attempt < 4:
-                    time.sleep(1)
+                if logger.isEnabledFor(logging.ERROR):
+                    logger.error("get_ip_from_ip2location - Error processing IP %s: %s", ip, e)
+            if attempt < self.MAX_RETRIES - 1:
+                await asyncio.sleep(self.RETRY_BACKOFF_FACTOR * 2 ** attempt)
         else:
             return None
 
-        data = response.json()
         lat = data.get('latitude') if data.get('latitude') != 'Not found' else None
         lng = data.get('longitude') if data.get('longitude') != 'Not found' else None
         
         timezone_str = None
         if lat is not None and lng is not None:
-            tf = TimezoneFinder()
-            timezone_str = tf.timezone_at(lat=lat, lng=lng)
-        timezone = pendulum.timezone(timezone_str) if timezone_str else None
+            timezone_str = _TF.timezone_at(lat=lat, lng=lng)
         
         return {
-            'ip_from': int(ipaddress.IPv4Address(ip)),  
-            'ip_to': int(ipaddress.IPv4Address(ip)),    
             'country_code': data.get('country_code') if data.get('country_code') != 'Not found' else None,
             'country_name': data.get('country_name') if data.get('country_name') != 'Not found' else None, 
             'region_name': data.get('state') if data.get('state') != 'Not found' else None,
@@ -96,13 +241,16 @@ class IPRetriever:
             'latitude': lat,
             'longitude': lng,
             'zip_code': data.get('postal') if data.get('postal') != 'Not found' else None,
-            'timezone': pendulum.now(timezone).format('Z') if timezone else None,
+            'timezone': _TZ_OFFSETS.get(timezone_str),
         }
 
-    def process_single_ip(self, ip: str) -> dict:
+    async def process_single_ip(self, session: aiohttp.ClientSession, semaphore: asyncio.Semaphore, rate_limiter: _TokenBucket, ip: str) -> dict:
         """Process a single IP address and return its geolocation data.
         
         Args:
+            session (aiohttp.ClientSession): Shared HTTP session used for the request
+            semaphore (asyncio.Semaphore): Semaphore bounding the number of in-flight requests
+            rate_limiter (_TokenBucket): Shared rate limiter for the API
             ip (str): IP address to process
             
         Returns:
@@ -110,15 +258,50 @@ class IPRetriever:
         """
         if ip is None:
             return {}
-        return self.get_ip_location_from_geolocation_db(ip) or {}
+        async with semaphore:
+            return await self.get_ip_location_from_geolocation_db(session, rate_limiter, ip) or {}
+
+    async def _gather_ips(self, unique_ips: list, pbar: tqdm) -> list:
+        """Look up all IPs concurrently on a single event loop.
+        
+        Args:
+            unique_ips (list): (ip, ip_int) pairs to look up
+            pbar (tqdm): Progress bar updated every PROGRESS_CHUNK_SIZE completed lookups
+            
+        Returns:
+            list: One result per IP, in the same order as `unique_ips`. Failed lookups
+                  are returned as the raised exception.
+        """
+        semaphore = asyncio.Semaphore(self.MAX_CONCURRENT_REQUESTS)
+        rate_limiter = _TokenBucket(self.RATE_LIMIT_CALLS, self.RATE_LIMIT_PERIOD)
+        connector = aiohttp.TCPConnector(limit=self.MAX_CONNECTIONS, ttl_dns_cache=300)
+        timeout = aiohttp.ClientTimeout(total=self.REQUEST_TIMEOUT)
+
+        completed = 0
+
+        async with aiohttp.ClientSession(connector=connector, timeout=timeout) as session:
+            async def run(ip: str) -> dict:
+                nonlocal completed
+                try:
+                    return await self.process_single_ip(session, semaphore, rate_limiter, ip)
+                finally:
+                    completed += 1
+                    if completed % self.PROGRESS_CHUNK_SIZE == 0:
+                        pbar.update(self.PROGRESS_CHUNK_SIZE)
+
+            results = await asyncio.gather(*(run(ip) for ip, _ in unique_ips), return_exceptions=True)
+
+        pbar.update(completed % self.PROGRESS_CHUNK_SIZE)
+        return results
 
     def get_ip_from_ip2location(self, ip_df: pl.DataFrame) -> pl.DataFrame:
         """Enrich IP data with location information from multiple sources.
         
         This method:
-        1. First tries to get locations from the combined database
-        2. Identifies IPs that need to be looked up from the external API
-        3. Processes missing IPs in parallel
+        1. Anti-joins against the resolved or attempted rows of the combined database
+           to find the IPs that need to be looked up from the external API
+        2. Serves recently attempted IPs from the on-disk lookup cache
+        3. Processes the remaining IPs concurrently
         4. Updates the combined database with new results
         5. Returns the enriched DataFrame
         
@@ -128,77 +311,74 @@ class IPRetriever:
         Returns:
             pl.DataFrame: DataFrame enriched with location information
         """
-        # Join with combined database
-        ip_df = ip_df.join(
-            self.combined_ip_location_df, 
-            left_on="cleaned_ip_int", 
-            right_on=["ip_from"],  
-            how="left"
-        )
-        
-        # Get IPs that need processing
+        # Get IPs that are not yet resolved or attempted in the combined database
         ip_with_missing_country_code_list = ip_df\
-            .filter(
-                (
-                    (pl.col("geolocation_db_attempted") == False) |
-                    (pl.col("geolocation_db_attempted").is_null())
-                ) &
-                (pl.col("country_code").is_null())
-            )\
             .filter(pl.col("cleaned_ip").is_not_null())\
-            .select("cleaned_ip")\
-            .unique()\
+            .join(
+                self.combined_ip_location_df.filter(
+                    pl.col('country_code').is_not_null() | (pl.col('geolocation_db_attempted') == True)
+                ),
+                left_on=pl.col("cleaned_ip_int").cast(pl.UInt32),
+                right_on="ip_from",
+                how="anti"
+            )\
+            .select("cleaned_ip", "cleaned_ip_int")\
+            .unique(subset="cleaned_ip_int")\
             .collect()\
-            .to_series()\
-            .to_list()
+            .rows()
 
         if not ip_with_missing_country_code_list:
             return self.combined_ip_location_df
 
-        # Process IPs in parallel
-        with ProcessPoolExecutor(max_workers=self.MAX_WORKERS) as executor:
-            unique_ips = list(set(ip_with_missing_country_code_list))
-            ts = time.time()
-            
-            result_dict = {
-                "ip_from": [], "ip_to": [], "country_code": [], "country_name": [],
-                "region_name": [], "city_name": [], "latitude": [], "longitude": [],
-                "zip_code": [], "timezone": [], "geolocation_db_attempted": []
+        # Process IPs concurrently; unique() above already deduplicated them
+        unique_ips = ip_with_missing_country_code_list
+        ts = time.time()
+
+        # Serve recent lookups from the on-disk cache
+        results = {}
+        ips_to_fetch = []
+        for ip, ip_int in unique_ips:
+            cached = self._get_cached_location(ip_int)
+            if cached is None:
+                ips_to_fetch.append((ip, ip_int))
+            else:
+                results[ip_int] = cached
+        logger.info(f"Found {len(results)} IPs in cache, fetching {len(ips_to_fetch)} from API")
+
+        with tqdm(total=len(ips_to_fetch), desc="Processing IPs") as pbar:
+            fetched = asyncio.run(self._gather_ips(ips_to_fetch, pbar))
+
+        rows_to_cache = []
+        for (ip, ip_int), result in zip(ips_to_fetch, fetched):
+            if isinstance(result, Exception):
+                if logger.isEnabledFor(logging.ERROR):
+                    logger.error("Error processing IP %s: %s", ip, result)
+                continue
+            results[ip_int] = result
+            rows_to_cache.append((ip_int, result))
+        self._cache_locations(rows_to_cache)
+
+        rows = [
+            {
+                "ip_from": ip_int,
+                "ip_to": ip_int,
+                "country_code": result.get("country_code"),
+                "country_name": result.get("country_name"),
+                "region_name": result.get("region_name"),
+                "city_name": result.get("city_name"),
+                "latitude": result.get("latitude"),
+                "longitude": result.get("longitude"),
+                "zip_code": result.get("zip_code"),
+                "timezone": result.get("timezone"),
+                "geolocation_db_attempted": True,
             }
-            
-            with tqdm(total=len(unique_ips), desc="Processing IPs") as pbar:
-                future_to_ip = {
-                    executor.submit(self.process_single_ip, ip): ip 
-                    for ip in unique_ips
-                }
-                
-                for future in as_completed(future_to_ip):
-                    ip = future_to_ip[future]
-                    try:
-                        result = future.result()
-                        if result is None:
-                            pbar.update(1)
-                            continue
-                            
-                        ip_int = int(ipaddress.IPv4Address(ip))
-                        result_dict["ip_from"].append(ip_int)
-                        result_dict["ip_to"].append(ip_int)
-                        result_dict["country_code"].append(result.get("country_code"))
-                        result_dict["country_name"].append(result.get("country_name"))
-                        result_dict["region_name"].append(result.get("region_name"))
-                        result_dict["city_name"].append(result.get("city_name"))
-                        result_dict["latitude"].append(result.get("latitude"))
-                        result_dict["longitude"].append(result.get("longitude"))
-                        result_dict["zip_code"].append(result.get("zip_code"))
-                        result_dict["timezone"].append(result.get("timezone"))
-                        result_dict["geolocation_db_attempted"].append(True)
-                        pbar.update(1)
-                    except Exception as e:
-                        logger.error(f"Error processing IP {ip}: {str(e)}")
-                        pbar.update(1)
-
-            logger.info(f"Processed {len(unique_ips)} IPs in {time.time() - ts:.2f} seconds")
-            result_df = pl.LazyFrame(result_dict)
+            for ip_int, result in results.items()
+        ]
+
+        logger.info(f"Processed {len(unique_ips)} IPs in {time.time() - ts:.2f} seconds")
+        if not rows:
+            return self.combined_ip_location_df
+        result_df = pl.from_dicts(rows, schema=_RESULT_SCHEMA).lazy()
 
         # Update combined database
         combined_ip_location_df = self.combined_ip_location_df\
@@ -209,16 +389,20 @@ class IPRetriever:
             how="diagonal_relaxed"
         )
         
-        # Save with temporary file for safety
+        # Save sorted by ip_from so row group statistics allow predicate pushdown
         tmp_path = self.combined_ip_location_path + '.tmp'
-        combined_ip_location_df.collect().write_parquet(
+        combined_ip_location_df.sort("ip_from").sink_parquet(
             tmp_path,
-            compression="gzip"
-        )
-        pl.scan_parquet(tmp_path).collect().write_parquet(
-            self.combined_ip_location_path,
-            compression="gzip" 
+            compression="zstd",
+            compression_level=3,
+            statistics=True,
+            row_group_size=self.ROW_GROUP_SIZE
         )
-        os.remove(tmp_path)
+        os.replace(tmp_path, self.combined_ip_location_path)
 
-        return pl.scan_parquet(self.combined_ip_location_path)
+        # Keep the new lookups so the next date does not overwrite them
+        self.combined_ip_location_df = pl.scan_parquet(self.combined_ip_location_path).with_columns(
+            pl.col('ip_from').cast(pl.UInt32),
+            pl.col('ip_to').cast(pl.UInt32)
+        )
+        return self.combined_ip_location_df
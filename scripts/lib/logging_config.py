@@ -5,7 +5,7 @@ def get_logger(name: str) -> logging.Logger:
     if not logger.handlers:
         handler = logging.StreamHandler()
         formatter = logging.Formatter(
-            fmt='%(asctime)s - %(name)s - %(levelname)s - %(funcName)s - %(message)s',
+            fmt='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
             datefmt="%Y-%m-%d %H:%M:%S"
         )
         handler.setFormatter(formatter)
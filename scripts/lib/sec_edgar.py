@@ -1,22 +1,24 @@
 # Standard library imports
+import functools
 import os
+import re
+import tempfile
+import threading
 import time
-from turtle import left
 import zipfile
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from pathlib import Path
 from typing import Dict, List, Optional, Tuple
-from ipaddress import IPv4Address
+from urllib.parse import urljoin
 # Third-party imports
 import pendulum
 import polars as pl
-from selenium.webdriver.common.by import By
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.support.ui import WebDriverWait
+import requests
 from fuzzywuzzy import fuzz
-import pandas as pd
 import country_converter as coco
 
 # Local imports
+from lib.config import Config
 from lib.logging_config import get_logger
 from lib.web_driver import WebDriver
 from lib.ip_retriever import IPRetriever
@@ -24,13 +26,30 @@ from lib.ip_retriever import IPRetriever
 
 logger = get_logger(__name__)
 
+# Returned by CountryConverter.convert for names it cannot map
+_CC_NOT_FOUND = '__NOT_FOUND__'
+
+
+@functools.lru_cache(maxsize=1)
+def _get_cc() -> coco.CountryConverter:
+    """Return a shared CountryConverter, building its lookup tables on first use."""
+    return coco.CountryConverter()
+
+
+@functools.lru_cache(maxsize=None)
+def _fetch_page(url: str, user_agent: str, timeout: int) -> str:
+    """Return the HTML of a static page, fetching each URL only once per process."""
+    response = requests.get(url, headers={'User-Agent': user_agent}, timeout=timeout)
+    response.raise_for_status()
+    return response.text
+
+
 class SECEdgar(WebDriver):
     """A class for downloading and processing SEC Edgar log files.
     
     This class provides functionality to:
     - Download SEC Edgar log files for specific dates
-    - Extract CSV files from downloaded zip archives
-    - Convert CSV files to Parquet format
+    - Convert the CSV files in downloaded zip archives to Parquet format
     - Clean and filter data based on RPV (Requests Per Volume) conditions
     - Enrich IP addresses with geolocation information
     
@@ -46,13 +65,25 @@ class SECEdgar(WebDriver):
         ip_location_path (str): Path to IP location database
         tmp_dir (str): Directory for temporary files
         download_dir (str): Directory for downloaded files
-        extract_dir (str): Directory for extracted files
         convert_dir (str): Directory for converted files
         no_bots_dir (str): Directory for filtered files
         output_dir (str): Directory for final output
         ip_retriever (IPRetriever): Instance for handling IP geolocation
+        ROW_GROUP_SIZE (int): Rows per row group when writing the converted log files
+        DATA_PAGE_SIZE (int): Target data page size in bytes for the converted log files
+        LOG_SCHEMA_OVERRIDES (dict): Fixed dtypes for log columns that are not inferred
+        LOG_LEADING_COLUMNS (List[str]): Filter and key columns written first in the converted log files
+        USER_AGENT (str): User-Agent sent when reading the Edgar log index pages
+        REQUEST_TIMEOUT (int): Timeout in seconds for reading the Edgar log index pages
     """
 
+    ROW_GROUP_SIZE = 1_048_576
+    DATA_PAGE_SIZE = 1_048_576
+    LOG_SCHEMA_OVERRIDES = {"ip": pl.Utf8, "cik": pl.Float64, "code": pl.Float64}
+    LOG_LEADING_COLUMNS = ['code', 'idx', 'crawler', 'ip', 'date', 'time']
+    USER_AGENT = getattr(Config, 'SEC_USER_AGENT', '')
+    REQUEST_TIMEOUT = 30
+
     def __init__(self, **kwargs):
         """Initialize the SECEdgar processor.
 
@@ -81,15 +112,22 @@ class SECEdgar(WebDriver):
         self.ip_retriever = IPRetriever()
         self.country_mapping_path = os.path.join(self.base_dir, "country_mapping.parquet")
 
-    def __get_year(self) -> int:
+        # Guard the files shared by dates processed in parallel
+        self._ip_lock = threading.Lock()
+        self._country_mapping_lock = threading.Lock()
+
+    def __get_year(self, date: Optional[str]) -> int:
         """Get the year for the Edgar logs.
 
+        Args:
+            date (Optional[str]): Date of the log (YYYY-MM-DD format), or None for the most recent log.
+
         Returns:
             int: The year to download logs for.
         """
-        if self.date is None:
+        if date is None:
             return pendulum.now().year
-        return pendulum.parse(self.date, strict=False).year
+        return pendulum.parse(date, strict=False).year
 
     def __setup_directories(self, download_folder: str) -> None:
         """Set up all required directories.
@@ -100,7 +138,6 @@ class SECEdgar(WebDriver):
         # Define directory paths
         self.tmp_dir = os.path.join(self.base_dir, "tmp")
         self.download_dir = os.path.join(self.tmp_dir, download_folder)
-        self.extract_dir = os.path.join(self.tmp_dir, "extracted")
         self.convert_dir = os.path.join(self.tmp_dir, "converted")
         self.no_bots_dir = os.path.join(self.tmp_dir, "no_bots")
         self.no_bots_ip_enriched_dir = os.path.join(self.no_bots_dir, "ip_enriched")
@@ -108,28 +145,36 @@ class SECEdgar(WebDriver):
         
         
         # Create directories
-        for directory in [self.download_dir, self.extract_dir, self.convert_dir, self.no_bots_dir, self.no_bots_ip_enriched_dir, self.output_dir]:
+        for directory in [self.download_dir, self.convert_dir, self.no_bots_dir, self.no_bots_ip_enriched_dir, self.output_dir]:
             os.makedirs(directory, exist_ok=True)
         
         # Configure downloads
         self.configure_downloads(self.download_dir)
 
     def __get_file_paths(self, file_name: str) -> Tuple[str, str, str, str, str]:
-        """Get paths for download, CSV, and Parquet files.
+        """Get paths for download and Parquet files.
 
         Args:
             file_name (str): Name of the downloaded file.
 
         Returns:
-            Tuple[str, str, str, str, str]: Paths for zip, CSV, Parquet, no-bots Parquet, and cleaned Parquet files.
+            Tuple[str, str, str, str, str]: Paths for zip, Parquet, no-bots Parquet, IP-enriched Parquet, and cleaned Parquet files.
+                The cleaned Parquet file is placed under output/year=YYYY/month=MM/day=DD/.
         """
         file_path = os.path.join(self.download_dir, file_name)
-        csv_path = os.path.join(self.extract_dir, file_name.replace('.zip', '.csv'))
         parquet_path = os.path.join(self.convert_dir, file_name.replace('.zip', '.parquet'))
         no_bots_parquet_path = os.path.join(self.no_bots_dir, file_name.replace('.zip', '.parquet'))
         no_bots_ip_enriched_parquet_path = os.path.join(self.no_bots_ip_enriched_dir, file_name.replace('.zip', '.parquet'))
-        cleaned_parquet_path = os.path.join(self.output_dir, file_name.replace('.zip', '.parquet'))
-        return file_path, csv_path, parquet_path, no_bots_parquet_path, no_bots_ip_enriched_parquet_path, cleaned_parquet_path
+        # Final output is Hive-partitioned by date so readers can prune whole days
+        date_str = file_name.replace("log", "").split(".")[0]
+        cleaned_parquet_path = os.path.join(
+            self.output_dir,
+            f"year={date_str[:4]}",
+            f"month={date_str[4:6]}",
+            f"day={date_str[6:8]}",
+            file_name.replace('.zip', '.parquet')
+        )
+        return file_path, parquet_path, no_bots_parquet_path, no_bots_ip_enriched_parquet_path, cleaned_parquet_path
 
     def __extract_date_from_link(self, link: str) -> pendulum.DateTime:
         """Extract the date from a log file link.
@@ -152,59 +197,77 @@ class SECEdgar(WebDriver):
     def obtain_edgar_log_links(self, url) -> Dict[str, str]:
         """Get all available Edgar log file links.
 
+        The index page is static HTML, so it is fetched with a plain HTTP request
+        instead of the browser.
+
+        Args:
+            url (str): URL of the yearly Edgar log index page.
+
         Returns:
-            List[str]: List of URLs for zip files containing Edgar logs.
+            Dict[str, str]: Mapping of log dates (YYYY-MM-DD) to zip file URLs.
 
-        Note:
-            Waits for links to be present on the page before extracting them.
+        Raises:
+            RuntimeError: If Config.SEC_USER_AGENT is not set.
         """
-        self.driver.get(url)
-        
-        # Wait for links to be present
-        WebDriverWait(self.driver, 10).until(
-            EC.presence_of_element_located((By.TAG_NAME, "a"))
-        )
-        
-        # Get all links and filter for zip files
-        all_links = [a.get_attribute('href') for a in self.driver.find_elements(by=By.TAG_NAME, value="a")]
-        zip_links = [link for link in all_links if link and link.endswith('.zip')]
+        if not self.USER_AGENT:
+            raise RuntimeError("Config.SEC_USER_AGENT is not set; the SEC requires a User-Agent naming you and your email")
+        html = _fetch_page(url, self.USER_AGENT, self.REQUEST_TIMEOUT)
+
+        # Get all links to zip files, resolving relative ones against the page
+        zip_links = [urljoin(url, link) for link in re.findall(r'href="([^"]+\.zip)"', html)]
         edgar_log_links_dict = {
             self.__extract_date_from_link(link).to_date_string(): link 
             for link in zip_links
         }
         return edgar_log_links_dict
 
-    def __extract_csv_from_zip(self, zip_path: str) -> str:
-        """Extract CSV file from zip archive.
+    def __find_csv_in_zip(self, zip_ref: zipfile.ZipFile) -> str:
+        """Find the CSV file inside a log zip archive.
 
         Args:
-            zip_path (str): Path to the zip file.
+            zip_ref (zipfile.ZipFile): The opened zip archive.
 
         Returns:
-            str: Path to the extracted CSV file.
+            str: Name of the CSV member in the archive.
 
         Raises:
             ValueError: If no CSV file is found in the zip archive.
         """
-        with zipfile.ZipFile(zip_path, 'r') as zip_ref:
-            csv_files = [f for f in zip_ref.namelist() if f.endswith('.csv')]
-            if not csv_files:
-                raise ValueError(f"No CSV file found in {zip_path}")
-            
-            csv_name = csv_files[0]
-            zip_ref.extract(csv_name, self.extract_dir)
-            return os.path.join(self.extract_dir, csv_name)
+        csv_files = [f for f in zip_ref.namelist() if f.endswith('.csv')]
+        if not csv_files:
+            raise ValueError(f"No CSV file found in {zip_ref.filename}")
+        return csv_files[0]
+
+    def __convert_to_parquet(self, zip_path: str, parquet_path: str) -> None:
+        """Convert the CSV inside a log zip archive to Parquet format.
 
-    def __convert_to_parquet(self, csv_path: str, parquet_path: str) -> None:
-        """Convert CSV file to Parquet format.
+        The CSV is extracted to a temporary folder so that it can be scanned and
+        streamed to Parquet; Polars cannot stream from an in-memory file handle.
+        The filter columns are written first, in 1M-row row groups with
+        per-row-group statistics, so that the filters in `cleaning_data` can skip
+        row groups when scanning it.
 
         Args:
-            csv_path (str): Path to the CSV file.
+            zip_path (str): Path to the zip file.
             parquet_path (str): Path where the Parquet file will be saved.
         """
-        logger.info(f"Converting {csv_path} to Parquet")
-        df = pl.read_csv(csv_path, low_memory=True, infer_schema_length=10000)
-        df.write_parquet(parquet_path, compression="gzip")
+        logger.info(f"Converting {zip_path} to Parquet")
+        with zipfile.ZipFile(zip_path, 'r') as zip_ref, tempfile.TemporaryDirectory(dir=self.tmp_dir) as extract_dir:
+            csv_path = zip_ref.extract(self.__find_csv_in_zip(zip_ref), path=extract_dir)
+            pl.scan_csv(
+                csv_path,
+                low_memory=True,
+                infer_schema_length=10000,
+                schema_overrides=self.LOG_SCHEMA_OVERRIDES
+            )\
+            .select(self.LOG_LEADING_COLUMNS + [pl.exclude(self.LOG_LEADING_COLUMNS)])\
+            .sink_parquet(
+                parquet_path,
+                compression="snappy",
+                statistics=True,
+                row_group_size=self.ROW_GROUP_SIZE,
+                data_page_size=self.DATA_PAGE_SIZE
+            )
         logger.info(f"Successfully converted to {parquet_path}")
 
     def cleaning_data(self, read_path: str, write_path: str) -> None:
@@ -223,91 +286,96 @@ class SECEdgar(WebDriver):
             read_path (str): Path to the input Parquet file.
             write_path (str): Path to save the cleaned Parquet file.
         """
-        # Load and filter data
+        # Load and filter data; the filter is pushed down into the parquet scan.
+        # ip is categorical so the RPV group-bys and the bot IP filter hash integer ids
         df = pl.scan_parquet(read_path)\
             .filter(
                 (pl.col('code') == 200) & (pl.col('idx') == 0) & (pl.col('crawler') == 0)
             )\
             .with_columns(
-                pl.concat_str([pl.col('date'), pl.col('time')], separator=' ')
-                .str.to_datetime("%Y-%m-%d %H:%M:%S").alias('datetime')
+                # Parse date and time separately instead of parsing a concatenated string
+                pl.col('date').str.to_date("%Y-%m-%d")
+                .dt.combine(pl.col('time').str.to_time("%H:%M:%S")).alias('datetime'),
+                pl.col('ip').cast(pl.Categorical)
             )
 
-        # Get base columns needed for analysis
+        # Get only the columns the RPV aggregations read
         rpv_base = df\
             .select(
                 'datetime',
                 'ip',
-                'cik',
-                'date',
-                'accession'
+                'cik'
             )
 
-        # Apply RPV conditions
-        rpv_cond1_ips = rpv_base\
-            .group_by(
-                pl.col('datetime').dt.truncate('1m'),
-                'ip'
-            )\
-            .agg(
-                pl.count().alias('no_of_requests_per_minute')
-            )\
-            .filter(pl.col('no_of_requests_per_minute') > 25)\
-            .select('ip')\
-            .unique()
-
-        rpv_cond2_ips = rpv_base\
+        # Aggregate requests and unique CIKs per minute and IP in a single pass
+        agg_per_min = rpv_base\
             .group_by(
                 pl.col('datetime').dt.truncate('1m'),
                 'ip'
             )\
             .agg(
+                pl.len().alias('no_of_requests_per_minute'),
                 pl.col('cik').n_unique().alias('no_of_unique_ciks')
-            )\
-            .filter(pl.col('no_of_unique_ciks') > 3)\
-            .select('ip')\
-            .unique()
+            )
 
-        rpv_cond3_ips = rpv_base\
+        # Apply RPV conditions on the per-minute aggregates
+        bot_ips = agg_per_min\
             .group_by('ip')\
             .agg(
-                pl.count().alias('no_of_requests_per_day')
+                pl.col('no_of_requests_per_minute').sum().alias('no_of_requests_per_day'),
+                pl.col('no_of_requests_per_minute').max().alias('max_requests_per_minute'),
+                pl.col('no_of_unique_ciks').max().alias('max_unique_ciks_per_minute')
             )\
-            .filter(pl.col('no_of_requests_per_day') > 500)\
-            .select('ip')\
-            .unique()
-
-        # Combine all bot IPs
-        bot_ips = pl.concat([
-            rpv_cond1_ips,
-            rpv_cond2_ips, 
-            rpv_cond3_ips
-        ]).unique()
-
-        # Get filtered IPs (non-bot IPs)
-        filtered_df = df.join(bot_ips, on='ip', how='anti')
-        
-        # Clean IP addresses
-        ipv4_pattern = r"^(\d{1,3})\.(\d{1,3})\.(\d{1,3})\.[^.\s]+$"
-        cleaned_df = filtered_df\
-            .with_columns(
-                pl.when(pl.col("ip").str.extract_groups(ipv4_pattern).is_not_null())
-                .then(
-                    pl.concat_str(
-                        [pl.col("ip").str.extract(ipv4_pattern, i) for i in range(1, 4)], separator="."
-                    ) + ".0"
-                )
-                .otherwise(None)
-                .alias("cleaned_ip")
+            .filter(
+                (pl.col('max_requests_per_minute') > 25) |
+                (pl.col('max_unique_ciks_per_minute') > 3) |
+                (pl.col('no_of_requests_per_day') > 500)
             )\
-            .with_columns(
-                pl.col("cleaned_ip")\
-                .map_elements(lambda x: int(IPv4Address(x)) if x else None, return_dtype=pl.Int64)
-                .alias('cleaned_ip_int')
-            )
+            .select('ip')
 
-        # Save the cleaned data
-        cleaned_df.collect().write_parquet(write_path, compression="gzip")
+        # Clean IP addresses to their /24 network and its integer form
+        ipv4_pattern = r"^(\d{1,3})\.(\d{1,3})\.(\d{1,3})\.[^.\s]+$"
+        octets = [pl.col("ip_octets").struct.field(str(i)).cast(pl.UInt32) for i in range(1, 4)]
+        is_valid_ip = pl.all_horizontal([octet <= 255 for octet in octets])
+
+        # One string cache keeps the categorical ips of the collected bot IPs and the scan in sync
+        with pl.StringCache():
+            # Materialise the small bot IP table once so the group-bys run a single time
+            bot_ips = bot_ips.collect()
+
+            # Get filtered IPs (non-bot IPs) and restore ip as a string for cleaning.
+            # Filtering on membership instead of an anti-join keeps the plan streamable
+            cleaned_df = df\
+                .filter(~pl.col('ip').is_in(bot_ips.get_column('ip')))\
+                .with_columns(pl.col('ip').cast(pl.Utf8))\
+                .with_columns(
+                    # Run the regex once per row and reuse its groups for both columns
+                    pl.col("ip").str.extract_groups(ipv4_pattern).alias("ip_octets")
+                )\
+                .with_columns(
+                    pl.when(is_valid_ip)
+                    .then(
+                        pl.concat_str([*(octet.cast(pl.Utf8) for octet in octets), pl.lit("0")], separator=".")
+                    )
+                    .otherwise(None)
+                    .alias("cleaned_ip"),
+                    pl.when(is_valid_ip)
+                    .then(
+                        octets[0].cast(pl.Int64) * 2**24 + octets[1].cast(pl.Int64) * 2**16 + octets[2].cast(pl.Int64) * 2**8
+                    )
+                    .otherwise(None)
+                    .alias("cleaned_ip_int")
+                )\
+                .drop("ip_octets")
+
+            # Stream the cleaned data to disk without materialising it
+            cleaned_df.sink_parquet(
+                write_path,
+                compression="zstd",
+                compression_level=3,
+                statistics=True,
+                row_group_size=self.ROW_GROUP_SIZE
+            )
         logger.info(f"Cleaned data saved to {write_path}")
 
     def __extract_ip(self, read_path: str, write_path: str) -> None:
@@ -323,112 +391,123 @@ class SECEdgar(WebDriver):
             read_path (str): Path to the cleaned Parquet file.
             write_path (str): Path to save the enriched Parquet file.
         """
-        # Extract unique IPs
-        tmp_raw_ips_path = os.path.join(self.tmp_dir, "raw_ips.parquet")
+        # Extract unique IPs; cleaned_ip_int alone identifies a cleaned IP, so dedupe on the integer key
         df = pl.scan_parquet(read_path)
-
-        df\
+        unique_ips_df = df\
             .select(
                 pl.col('cleaned_ip'),
                 pl.col('cleaned_ip_int')
             )\
-            .unique()\
-            .collect()\
-            .write_parquet(tmp_raw_ips_path, compression="gzip")
+            .unique(subset='cleaned_ip_int')
         
-        # Get IP geolocation data
-        ip_with_country_code_df = self.ip_retriever.get_ip_from_ip2location(ip_df=pl.scan_parquet(tmp_raw_ips_path))
-
-        # Join with original data and save
+        # Look up the IPs while no other date updates the IP database, and keep only
+        # this date's rows in memory so the join below does not read the database file
+        with self._ip_lock:
+            ip_with_country_code_df = self.ip_retriever.get_ip_from_ip2location(ip_df=unique_ips_df)\
+                .join(
+                    unique_ips_df.select(pl.col("cleaned_ip_int").cast(pl.UInt32).alias("ip_from")),
+                    on="ip_from",
+                    how="semi"
+                )\
+                .collect()
+
+        # Join with original data and stream to disk
         df\
            .join(
-                ip_with_country_code_df,
-                left_on="cleaned_ip_int", 
+                ip_with_country_code_df.lazy(),
+                left_on=pl.col("cleaned_ip_int").cast(pl.UInt32), 
                 right_on=["ip_from"],  
                 how="left"
             )\
-            .collect()\
-            .write_parquet(write_path, compression="gzip")
+            .drop("ip_from")\
+            .sink_parquet(write_path, compression="snappy")
         
         logger.info(f"Extracted IP with country code to {write_path}")
 
-    def preprocess(self, date:str, url=None, force=None) -> None:
-        # Set up date and URL
-        self.date = date
-        self.year = self.__get_year()
-        self.base_url = f'https://www.sec.gov/files/edgar{self.year}.html'
-        self.url = url
-        self.force = force
-        
-        """Download and process the specified Edgar log file.
+    def __get_file_name(self, date: Optional[str]) -> str:
+        """Get the name of the log zip file for a date.
 
-        This method orchestrates the entire process:
-        1. Gets all available log file links
-        2. Filters for the requested date (or most recent if no date specified)
-        3. Downloads the selected file (if not exists or force=True)
-        4. Extracts the CSV from the zip (if not exists or force=True)
-        5. Converts the CSV to Parquet format (if not exists or force=True)
-        6. Cleans the data by applying RPV conditions
-        7. Enriches IP addresses with geolocation information
+        Args:
+            date (Optional[str]): Date of the log (YYYY-MM-DD format), or None for today.
 
-        Raises:
-            ValueError: If the specified date is not found in available logs.
+        Returns:
+            str: Name of the log zip file.
         """
-        # Construct file name based on date
-        if self.date:
-            file_name = f"log{self.date.replace('-', '')}.zip"
-        else:
-            # Use current date if no date specified
-            from datetime import datetime
-            current_date = datetime.now().strftime("%Y%m%d")
-            file_name = f"log{current_date}.zip"
+        if date:
+            return f"log{date.replace('-', '')}.zip"
+        # Use current date if no date specified
+        return f"log{pendulum.now().format('YYYYMMDD')}.zip"
 
-        # Get file paths
-        zip_path, csv_path, parquet_path, no_bots_parquet_path, no_bots_ip_enriched_parquet_path, cleaned_parquet_path = self.__get_file_paths(file_name)
+    def __get_log_link(self, date: Optional[str], url: Optional[str] = None) -> Optional[str]:
+        """Get the link to download for a date, or None if the zip file already exists (and force is not set).
 
-        # Only start driver and download if file doesn't exist
-        if not os.path.exists(zip_path) or self.force:
-            self.start_driver()
-            try:
-                if self.url is None:
-                    # Get all available log links
-                    edgar_log_links_dict = self.obtain_edgar_log_links(url=self.base_url)
-                    logger.info(f"Found {len(edgar_log_links_dict)} zip files to download")
-                    # Get target link based on date
-                    if self.date:
-                        if self.date not in edgar_log_links_dict:
-                            raise ValueError(f"No log file found for date {self.date}")
-                        target_link = edgar_log_links_dict[self.date]
-                    else:
-                        latest_date = max(edgar_log_links_dict.keys())
-                        target_link = edgar_log_links_dict[latest_date]
-                else:
-                    target_link = self.url
-                
+        Args:
+            date (Optional[str]): Date of the log (YYYY-MM-DD format), or None for the most recent log.
+            url (Optional[str]): Direct URL of the log file. If None, it is looked up on the yearly index page.
 
+        Returns:
+            Optional[str]: URL of the log zip file to download, or None if no download is needed.
 
-                # Download the file
-                logger.info(f"Starting download of {target_link}")
-                self.download_file(target_link)
-                logger.info(f"Download completed for {target_link}")
-            finally:
-                self.driver.quit()
-        else:
+        Raises:
+            ValueError: If the specified date is not found in available logs.
+        """
+        zip_path = self.__get_file_paths(self.__get_file_name(date))[0]
+
+        # Only download if file doesn't exist
+        if os.path.exists(zip_path) and not self.force:
             logger.info(f"Zip file already exists at {zip_path}, skipping download")
-        
-        # Extract CSV if it doesn't exist or force=True
-        if not os.path.exists(csv_path) or self.force:
-            logger.info(f"Extracting CSV from {zip_path}")
-            extracted_csv = self.__extract_csv_from_zip(zip_path)
-            logger.info(f"CSV extracted to {extracted_csv}")
-        else:
-            logger.info(f"CSV file already exists at {csv_path}, skipping extraction")
-            extracted_csv = csv_path
+            return None
+
+        if url is not None:
+            return url
+
+        # Get all available log links
+        base_url = f'https://www.sec.gov/files/edgar{self.__get_year(date)}.html'
+        edgar_log_links_dict = self.obtain_edgar_log_links(url=base_url)
+        logger.info(f"Found {len(edgar_log_links_dict)} zip files to download")
+        # Get target link based on date
+        if date:
+            if date not in edgar_log_links_dict:
+                raise ValueError(f"No log file found for date {date}")
+            return edgar_log_links_dict[date]
+        latest_date = max(edgar_log_links_dict.keys())
+        return edgar_log_links_dict[latest_date]
+
+    def __download_logs(self, target_links: List[str]) -> None:
+        """Download log zip files, in parallel tabs of one browser when there are several.
+
+        Args:
+            target_links (List[str]): URLs of the log zip files to download.
+        """
+        if not target_links:
+            return
+
+        # Only the download itself needs the browser
+        self.start_driver()
+        try:
+            logger.info(f"Starting download of {', '.join(target_links)}")
+            if len(target_links) == 1:
+                self.download_file(target_links[0])
+            else:
+                self.download_files(target_links)
+        finally:
+            self.quit_driver()
+
+    def __process_log(self, date: Optional[str]) -> None:
+        """Run the Polars stages of the pipeline on a downloaded log file.
+
+        Only state shared between dates is touched under a lock, so several dates
+        can be processed concurrently.
+
+        Args:
+            date (Optional[str]): Date of the log (YYYY-MM-DD format), or None for today.
+        """
+        zip_path, parquet_path, no_bots_parquet_path, no_bots_ip_enriched_parquet_path, cleaned_parquet_path = self.__get_file_paths(self.__get_file_name(date))
 
         # Convert to Parquet if it doesn't exist or force=True
         if not os.path.exists(parquet_path) or self.force:
-            logger.info(f"Converting CSV to Parquet")
-            self.__convert_to_parquet(extracted_csv, parquet_path)
+            logger.info(f"Converting CSV in {zip_path} to Parquet")
+            self.__convert_to_parquet(zip_path, parquet_path)
         else:
             logger.info(f"Parquet file already exists at {parquet_path}, skipping conversion")
 
@@ -448,7 +527,77 @@ class SECEdgar(WebDriver):
         logger.info(msg=f"Cleaning country names")
         self.__clean_country_names(read_path=no_bots_ip_enriched_parquet_path, write_path=cleaned_parquet_path)
 
+    def preprocess(self, date: str, url=None, force=None) -> None:
+        """Download and process the specified Edgar log file.
+
+        This method orchestrates the entire process:
+        1. Gets all available log file links
+        2. Filters for the requested date (or most recent if no date specified)
+        3. Downloads the selected file (if not exists or force=True)
+        4. Converts the CSV in the zip to Parquet format (if not exists or force=True)
+        5. Cleans the data by applying RPV conditions
+        6. Enriches IP addresses with geolocation information
 
+        Args:
+            date (str): Date of the log to process (YYYY-MM-DD format).
+            url (str, optional): Direct URL of the log file. Defaults to None.
+            force (bool, optional): If True, reprocesses existing files. Defaults to None.
+
+        Raises:
+            ValueError: If the specified date is not found in available logs.
+        """
+        # Set up date and URL
+        self.date = date
+        self.year = self.__get_year(date)
+        self.base_url = f'https://www.sec.gov/files/edgar{self.year}.html'
+        self.url = url
+        self.force = force
+
+        target_link = self.__get_log_link(date, url)
+        self.__download_logs([target_link] if target_link else [])
+        self.__process_log(date)
+
+    def process_dates(self, dates: List[str], max_workers: int = 2, force=None) -> None:
+        """Download and process the Edgar log files for several dates.
+
+        The missing log files are downloaded in parallel tabs of one browser, then
+        the Polars stages of each date run concurrently in a thread pool. Dates
+        without a log file, or whose download failed, are logged and skipped.
+
+        Args:
+            dates (List[str]): Dates of the logs to process (YYYY-MM-DD format).
+            max_workers (int, optional): Number of dates processed concurrently. Each
+                worker can hold a day of logs in memory. Defaults to 2.
+            force (bool, optional): If True, reprocesses existing files. Defaults to None.
+        """
+        self.force = force
+
+        # Resolve each date on its own so that one missing log does not stop the run
+        found_dates = []
+        target_links = []
+        for date in dates:
+            try:
+                target_link = self.__get_log_link(date)
+            except ValueError as e:
+                logger.warning(f"Skipping {date}: {e}")
+                continue
+            found_dates.append(date)
+            if target_link:
+                target_links.append(target_link)
+        self.__download_logs(target_links)
+
+        dates_to_process = []
+        for date in found_dates:
+            if os.path.exists(self.__get_file_paths(self.__get_file_name(date))[0]):
+                dates_to_process.append(date)
+            else:
+                logger.error(f"Skipping {date}: the log file was not downloaded")
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            futures = {executor.submit(self.__process_log, date): date for date in dates_to_process}
+            for future in as_completed(futures):
+                future.result()
+                logger.info(f"Finished processing {futures[future]}")
 
     def __clean_country_names(self, read_path: str, write_path: str, country_col: str = 'country_name') -> None:
         """Clean and standardize country names in the dataset.
@@ -467,71 +616,81 @@ class SECEdgar(WebDriver):
         # Load input data
         df = pl.scan_parquet(read_path)
 
-        # Load or create country mapping
-        if os.path.exists(self.country_mapping_path):
-            country_mapping_df = pl.scan_parquet(self.country_mapping_path)
-        else:
-            country_mapping_df = pl.LazyFrame(schema={
-                "raw_country_name": pl.Utf8,
-                "cleaned_country_name": pl.Utf8
-            })
-
-        # Find unmapped countries
-        unmapped_countries = df\
-            .select(pl.col(country_col))\
-            .join(
-                country_mapping_df,
-                left_on=country_col,
-                right_on="raw_country_name",
-                how="anti"
-            )\
-            .unique()
-
-        # Convert unmapped countries
-        cc = coco.CountryConverter()
-        def convert_country(name: str) -> str:
-            try:
-                return cc.convert(name, to='name')
-            except:
-                logger.warning(f"Could not convert country name: {name}")
-                return name
-
-        new_mappings = unmapped_countries.select(
-            pl.col(country_col).alias("raw_country_name"),
-            pl.col(country_col).map_elements(convert_country, return_dtype=pl.Utf8).alias('cleaned_country_name')
-        )
-
-        # Update master mapping file
-        tmp_country_mapping_path = os.path.join(self.tmp_dir, "country_mapping.parquet")
-        pl.concat([new_mappings, country_mapping_df])\
-            .collect()\
-            .write_parquet(tmp_country_mapping_path, compression="gzip")
-        pl.scan_parquet(tmp_country_mapping_path)\
-            .collect()\
-            .write_parquet(self.country_mapping_path, compression="gzip")
-        os.remove(tmp_country_mapping_path)
-
-        # Verify mapping file
-        country_mapping = pl.scan_parquet(self.country_mapping_path)
-        if "raw_country_name" not in country_mapping.collect_schema().names() or "cleaned_country_name" not in country_mapping.collect_schema().names():
-            logger.error("Country mapping file missing required columns")
-            raise ValueError("Country mapping file missing required columns")
-
-        # Apply mappings to full dataset
-        df\
-            .join(
-                country_mapping,
-                left_on=country_col,
-                right_on="raw_country_name",
-                how="left"
-            )\
-            .with_columns(
-                pl.when(pl.col("cleaned_country_name").is_not_null())\
-                .then(pl.col("cleaned_country_name"))\
-                .otherwise(pl.col(country_col))\
-                .alias(country_col)
-            )\
-            .drop(["raw_country_name", "cleaned_country_name"], strict=False)\
-            .collect()\
-            .write_parquet(write_path, compression="gzip")
+        # Update the mapping while no other date reads or writes it
+        with self._country_mapping_lock:
+            # Load or create country mapping
+            if os.path.exists(self.country_mapping_path):
+                country_mapping_df = pl.scan_parquet(self.country_mapping_path)
+            else:
+                country_mapping_df = pl.LazyFrame(schema={
+                    "raw_country_name": pl.Utf8,
+                    "cleaned_country_name": pl.Utf8
+                })
+
+            # Find unmapped countries
+            unmapped_countries = df\
+                .select(pl.col(country_col))\
+                .join(
+                    country_mapping_df,
+                    left_on=country_col,
+                    right_on="raw_country_name",
+                    how="anti"
+                )\
+                .unique()\
+                .drop_nulls()
+
+            # Convert unmapped countries in a single batch
+            cc = _get_cc()
+            unmapped_list = unmapped_countries.collect().get_column(country_col).to_list()
+            converted = cc.convert(unmapped_list, to='name', not_found=_CC_NOT_FOUND) if unmapped_list else []
+            if not isinstance(converted, list):
+                converted = [converted]
+
+            cleaned_list = []
+            for raw_name, cleaned_name in zip(unmapped_list, converted):
+                if cleaned_name != _CC_NOT_FOUND:
+                    cleaned_list.append(cleaned_name)
+                else:
+                    logger.warning(f"Could not convert country name: {raw_name}")
+                    cleaned_list.append(raw_name)
+
+            new_mappings = pl.DataFrame(
+                {"raw_country_name": unmapped_list, "cleaned_country_name": cleaned_list},
+                schema={"raw_country_name": pl.Utf8, "cleaned_country_name": pl.Utf8}
+            ).lazy()
+
+            # Update master mapping file with a temporary file for safety
+            tmp_country_mapping_path = self.country_mapping_path + '.tmp'
+            pl.concat([new_mappings, country_mapping_df])\
+                .collect()\
+                .write_parquet(tmp_country_mapping_path, compression="zstd", compression_level=3)
+            os.replace(tmp_country_mapping_path, self.country_mapping_path)
+
+            # Verify mapping file
+            country_mapping = pl.read_parquet(self.country_mapping_path).lazy()
+            country_mapping_columns = set(country_mapping.collect_schema().names())
+            if not {"raw_country_name", "cleaned_country_name"} <= country_mapping_columns:
+                logger.error("Country mapping file missing required columns")
+                raise ValueError("Country mapping file missing required columns")
+
+        # Apply mappings to full dataset, joining on categorical ids under a shared string cache
+        os.makedirs(os.path.dirname(write_path), exist_ok=True)
+        with pl.StringCache():
+            df\
+                .with_columns(pl.col(country_col).cast(pl.Categorical))\
+                .join(
+                    country_mapping.with_columns(pl.col("raw_country_name").cast(pl.Categorical)),
+                    left_on=country_col,
+                    right_on="raw_country_name",
+                    how="left"
+                )\
+                .with_columns(
+                    pl.when(pl.col("cleaned_country_name").is_not_null())\
+                    .then(pl.col("cleaned_country_name"))\
+                    .otherwise(pl.col(country_col).cast(pl.Utf8))\
+                    .alias(country_col)
+                )\
+                .drop(["raw_country_name", "cleaned_country_name"], strict=False)\
+                .collect()\
+                .write_parquet(write_path, compression="zstd", compression_level=3)
             
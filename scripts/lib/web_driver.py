@@ -1,22 +1,332 @@
-# Selenium and Undetected Chromedriver
-from selenium.webdriver.support import expected_conditions as EC
-from selenium.webdriver.common.desired_capabilities import DesiredCapabilities
-from selenium.common.exceptions import WebDriverException
-from selenium import webdriver
-import undetected_chromedriver as uc
+from __future__ import annotations
+
+import psutil
+from watchdog.events import FileSystemEvent, FileSystemEventHandler
+from watchdog.observers import Observer
 from urllib.parse import urlparse, urlunparse
-import os
+import copy
+import functools
+import queue
+import re
+import threading
 import time
-import json
-import subprocess
-from typing import List, Dict, Optional, Union
+from typing import IO, TYPE_CHECKING, Callable, List, Dict, Optional, Tuple, Union
 from pathlib import Path
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
 
 # Custom modules
 from lib.logging_config import get_logger
 
+# Selenium and undetected-chromedriver are imported where a browser is needed,
+# since importing uc alone takes hundreds of milliseconds
+if TYPE_CHECKING:
+    import undetected_chromedriver as uc
+
 logger = get_logger(__name__)
 
+# Site data cleared between jobs of a pooled browser, leaving the HTTP cache
+_SITE_STORAGE_TYPES = 'local_storage,indexeddb,websql,service_workers,cache_storage'
+
+# Byte count of a loadingFinished event in a serialized performance log message
+_LOADING_FINISHED_RE = re.compile(
+    r'"method":"Network\.loadingFinished".*?"encodedDataLength":(\d+(?:\.\d+)?)'
+)
+
+
+def _try_lock(lock_file: IO) -> None:
+    """Take a non-blocking exclusive lock on an open file.
+
+    Raises:
+        OSError: If another driver already holds the lock.
+    """
+    if fcntl is not None:
+        fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    else:
+        msvcrt.locking(lock_file.fileno(), msvcrt.LK_NBLCK, 1)
+
+
+def _kill_browser_processes(driver: uc.Chrome, timeout: float = 3) -> None:
+    """Terminate only the browser and chromedriver process trees of a driver.
+
+    Processes get SIGTERM first and SIGKILL if they are still alive after the grace period.
+
+    Args:
+        driver (uc.Chrome): Driver whose processes should be stopped.
+        timeout (float, optional): Grace period in seconds before killing. Defaults to 3.
+    """
+    service = getattr(driver, 'service', None)
+    service_process = getattr(service, 'process', None)
+    pids = [getattr(driver, 'browser_pid', None), getattr(service_process, 'pid', None)]
+
+    procs = []
+    for pid in pids:
+        if pid is None:
+            continue
+        try:
+            proc = psutil.Process(pid)
+            procs.extend(proc.children(recursive=True))
+            procs.append(proc)
+        except psutil.NoSuchProcess:
+            continue
+
+    for proc in procs:
+        try:
+            proc.terminate()
+        except psutil.NoSuchProcess:
+            pass
+    _, alive = psutil.wait_procs(procs, timeout=timeout)
+    for proc in alive:
+        try:
+            proc.kill()
+        except psutil.NoSuchProcess:
+            pass
+
+
+def _close_browser(driver: uc.Chrome) -> None:
+    """Quit a browser and free the profile slot it was started with."""
+    try:
+        driver.quit()
+    finally:
+        profile_lock = getattr(driver, '_profile_lock', None)
+        if profile_lock is not None:
+            profile_lock.close()
+
+
+def _dedupe_blocked_urls(patterns: List[str]) -> Tuple[str, ...]:
+    """Drop duplicate URL patterns and sort the rest.
+
+    Chrome matches blocked URL patterns against the whole URL, so "*.css" alone
+    misses "style.css?v=1" and both "X" and "X?*" forms are kept. Merging them into
+    "X*" would also block any URL containing the extension, such as "www.iconfinder.com".
+
+    Args:
+        patterns (List[str]): URL patterns to block.
+
+    Returns:
+        Tuple[str, ...]: Sorted, deduplicated patterns.
+    """
+    return tuple(sorted(set(patterns)))
+
+
+class _DownloadEventHandler(FileSystemEventHandler):
+    """Track Chrome's in-progress downloads from file system events.
+
+    Chrome writes a download to a .crdownload file and renames it when done, so
+    the download is complete once no .crdownload file is left.
+
+    Attributes:
+        started (threading.Event): Set when a new download appears in the directory
+        done (threading.Event): Set while no download is in progress
+    """
+
+    def __init__(self):
+        """Initialize the handler with no download in progress."""
+        super().__init__()
+        self._pending = set()
+        self._lock = threading.Lock()
+        self.started = threading.Event()
+        self.done = threading.Event()
+        self.done.set()
+
+    def _add(self, path: str) -> None:
+        with self._lock:
+            self._pending.add(path)
+            self.done.clear()
+        self.started.set()
+
+    def _remove(self, path: str) -> None:
+        with self._lock:
+            self._pending.discard(path)
+            if not self._pending:
+                self.done.set()
+
+    def on_created(self, event: FileSystemEvent) -> None:
+        if event.is_directory:
+            return
+        if event.src_path.endswith('.crdownload'):
+            self._add(event.src_path)
+        else:
+            self.started.set()
+
+    def on_moved(self, event: FileSystemEvent) -> None:
+        if event.is_directory:
+            return
+        # Register the new name first so a rename between partial files never looks finished
+        if event.dest_path.endswith('.crdownload'):
+            self._add(event.dest_path)
+        else:
+            self.started.set()
+        if event.src_path.endswith('.crdownload'):
+            self._remove(event.src_path)
+
+    def on_deleted(self, event: FileSystemEvent) -> None:
+        if not event.is_directory and event.src_path.endswith('.crdownload'):
+            self._remove(event.src_path)
+
+
+class BrowserPool:
+    """A pool of pre-warmed Chrome instances handed out to WebDriver users.
+
+    Starting Chrome and handshaking with the driver takes seconds, so the pool
+    launches its browsers up front and reuses them across jobs. A browser is
+    recycled after max_uses jobs or when it fails, and callers wait on the queue
+    while every browser is in use. Once no browser is left running, acquire
+    raises instead of waiting.
+
+    Attributes:
+        pool_size (int): Number of browsers kept in the pool
+        max_uses (int): Number of jobs after which a browser is replaced
+    """
+
+    def __init__(self, launcher: Callable[[], uc.Chrome], pool_size: int = 2, max_uses: int = 50):
+        """Initialize the pool and launch its browsers in parallel.
+
+        Args:
+            launcher (Callable[[], uc.Chrome]): Function returning a newly started browser.
+            pool_size (int, optional): Number of browsers kept in the pool. Defaults to 2.
+            max_uses (int, optional): Number of jobs after which a browser is replaced. Defaults to 50.
+
+        Raises:
+            Exception: The launcher's error if one of the browsers fails to start.
+        """
+        self.pool_size = pool_size
+        self.max_uses = max_uses
+        self._launcher = launcher
+        self._idle = queue.Queue()
+        self._uses = {}
+        self._spawning = pool_size
+        self._lock = threading.Lock()
+
+        errors = []
+
+        def spawn() -> None:
+            try:
+                self._spawn()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=spawn) for _ in range(pool_size)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        if errors:
+            self.close()
+            raise errors[0]
+        logger.debug(f'Started browser pool with {self._idle.qsize()} browsers')
+
+    def _spawn(self) -> None:
+        """Launch a browser and add it to the idle queue.
+
+        The caller counts the launch in _spawning beforehand, so that acquire can
+        tell a pool that is being refilled from one with no browsers left. If the
+        last browser fails to start, None is queued to wake the waiting callers.
+        """
+        try:
+            driver = self._launcher()
+        except Exception as e:
+            logger.error(f'Error starting pooled browser : {e}')
+            with self._lock:
+                self._spawning -= 1
+                if not self._uses and not self._spawning:
+                    self._idle.put(None)
+            raise
+        with self._lock:
+            self._spawning -= 1
+            self._uses[id(driver)] = 0
+        self._idle.put(driver)
+
+    @staticmethod
+    def _destroy(driver: uc.Chrome) -> None:
+        """Quit a browser, ignoring errors from one that already died."""
+        try:
+            _close_browser(driver)
+        except Exception as e:
+            logger.debug(f'Error closing pooled browser : {e}')
+            _kill_browser_processes(driver)
+
+    def acquire(self, timeout: Optional[float] = None) -> uc.Chrome:
+        """Take a browser from the pool, waiting until one is free.
+
+        Args:
+            timeout (float, optional): Maximum time to wait in seconds. Defaults to None (wait forever).
+
+        Returns:
+            uc.Chrome: A browser reserved for the caller until it is released.
+
+        Raises:
+            RuntimeError: If the pool has no running browsers and none is starting.
+            queue.Empty: If no browser became free within the timeout.
+        """
+        with self._lock:
+            if not self._uses and not self._spawning:
+                raise RuntimeError('Browser pool has no running browsers')
+        driver = self._idle.get(timeout=timeout)
+        if driver is None:
+            # Pass the wake-up on to the next waiting caller
+            self._idle.put(None)
+            raise RuntimeError('Browser pool has no running browsers')
+        return driver
+
+    def release(self, driver: uc.Chrome, failed: bool = False) -> None:
+        """Return a browser to the pool, replacing it if it is worn out or broken.
+
+        Cookies and the storage of the site left open are cleared so jobs do not see
+        each other's state. The HTTP disk cache is kept for the next job.
+
+        Args:
+            driver (uc.Chrome): Browser previously returned by acquire.
+            failed (bool, optional): Whether the job using the browser failed. Defaults to False.
+        """
+        if not failed:
+            try:
+                driver.execute_cdp_cmd('Network.clearBrowserCookies', {})
+                url = urlparse(driver.current_url)
+                if url.scheme in ('http', 'https'):
+                    driver.execute_cdp_cmd('Storage.clearDataForOrigin', {
+                        'origin': f'{url.scheme}://{url.netloc}',
+                        'storageTypes': _SITE_STORAGE_TYPES
+                    })
+            except Exception as e:
+                logger.debug(f'Error resetting pooled browser : {e}')
+                failed = True
+
+        with self._lock:
+            uses = self._uses.pop(id(driver), 0) + 1
+            replace = failed or uses >= self.max_uses
+            if replace:
+                self._spawning += 1
+            else:
+                self._uses[id(driver)] = uses
+
+        if replace:
+            self._destroy(driver)
+            try:
+                self._spawn()
+            except Exception:
+                # The pool shrinks by one; acquire fails once it is empty
+                pass
+        else:
+            self._idle.put(driver)
+
+    def close(self) -> None:
+        """Quit every idle browser in the pool."""
+        while True:
+            try:
+                driver = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if driver is None:
+                continue
+            with self._lock:
+                self._uses.pop(id(driver), None)
+            self._destroy(driver)
+
+
 class WebDriver:
     """A base class for handling web browser automation using Selenium and undetected-chromedriver.
     
@@ -41,12 +351,11 @@ class WebDriver:
         '--disable-blink-features=AutomationControlled'
     ]
     
-    # Default blocked URLs for performance optimization
-    default_blocked_urls = [
-        # Image formats
-        "*.png", "*.png?*", "*.jpg", "*.jpg?*", "*.jpeg", "*.jpeg?*",
-        "*.gif", "*.gif?*", "*.webp", "*.webp?*",
-        
+    # Block images through Chrome's content settings, which skips them before any URL matching
+    block_images = True
+
+    # Default blocked URLs for performance optimization; images are covered by block_images
+    default_blocked_urls = _dedupe_blocked_urls([
         # Video formats
         "*.mp4", "*.mp4?*", "*.webm", "*.webm?*",
         
@@ -89,7 +398,12 @@ class WebDriver:
         
         # General static resources
         "*/static/*.js"
-    ]
+    ])
+
+    # Persistent profiles keep Chrome's disk cache between runs
+    persistent_profile = True
+    profile_root = Path.home() / '.sec_edgar_chrome_profile'
+    disk_cache_size = 536_870_912
 
     def __init__(self):
         """Initialize the WebDriver class."""
@@ -97,6 +411,12 @@ class WebDriver:
         self.download_dir = None
         self._download_prefs = {}
         self._download_options = []
+        self._pool = None
+        self._attached_target_id = None
+        self._download_events = None
+        self._download_observer = None
+        self._bytes_received = 0
+        self._base_options = None
 
     def configure_downloads(self, download_dir: Union[str, Path]) -> None:
         """Configure download settings for the browser.
@@ -125,52 +445,84 @@ class WebDriver:
             "--disable-dev-shm-usage"
         ]
 
-    def start_driver(self, 
-                    implicitly_wait_time: int = 2, 
-                    headless: bool = False, 
-                    additional_prefs: Optional[Dict] = None, 
-                    additional_options: Optional[List[str]] = None, 
-                    **kwargs) -> None:
-        """Initialize and start the Chrome WebDriver with specified options.
+        # Rebuild the options template with the new download settings
+        self._base_options = None
+
+        # Watch the download directory for Chrome's partial download files
+        if self._download_observer is not None:
+            self._download_observer.stop()
+        self._download_events = _DownloadEventHandler()
+        self._download_observer = Observer()
+        self._download_observer.schedule(self._download_events, str(self.download_dir), recursive=False)
+        self._download_observer.daemon = True
+        self._download_observer.start()
+
+    def build_options(self, 
+                      headless: bool = False, 
+                      additional_prefs: Optional[Dict] = None, 
+                      additional_options: Optional[List[str]] = None, 
+                      record_network: bool = False,
+                      **kwargs) -> uc.ChromeOptions:
+        """Assemble the Chrome options used to launch a browser.
 
         Args:
-            implicitly_wait_time (int, optional): Time to wait for elements to be present. Defaults to 2.
             headless (bool, optional): Whether to run browser in headless mode. Defaults to False.
             additional_prefs (Dict, optional): Additional Chrome preferences. Defaults to None.
             additional_options (List[str], optional): Additional Chrome options. Defaults to None.
+            record_network (bool, optional): Whether chromedriver records the performance log
+                read by get_network_log. It buffers every event, so it is off by default. Defaults to False.
             **kwargs: Additional arguments to pass to ChromeOptions.
 
+        Returns:
+            uc.ChromeOptions: A new options object; uc does not allow one to be reused.
+
         Note:
             This method sets up Chrome with various security and performance optimizations.
             If download settings were configured, they will be included in the options.
         """
-        logger.info('Starting Web Driver')
+        # Start from a copy of the shared template, then add the per-launch settings
+        options = copy.deepcopy(self._get_base_options())
 
-        # Set up Chrome options
-        option_list = kwargs.get('option_list', []) + self.default_option_list
+        option_list = kwargs.get('option_list', [])
         if headless:
-            option_list.append('--headless=new')
+            option_list = option_list + ['--headless=new']
+        for option in dict.fromkeys(option_list + (additional_options or [])):
+            if option not in options.arguments:
+                options.add_argument(option)
         
+        # Set up network logging only when asked for, since chromedriver buffers every event
+        if record_network:
+            options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
+
+        # Merge additional preferences
+        if additional_prefs:
+            options.experimental_options["prefs"].update(additional_prefs)
+        return options
+
+    def _get_base_options(self) -> uc.ChromeOptions:
+        """Get the options shared by every launch, building them on first use.
+
+        The template is never passed to uc itself, so build_options can copy it for
+        each launch. configure_downloads clears it since it holds the download settings.
+
+        Returns:
+            uc.ChromeOptions: The shared options template.
+        """
+        if self._base_options is not None:
+            return self._base_options
+
+        import undetected_chromedriver as uc
+
+        # Set up Chrome options, including download options if configured, without repeats
         options = uc.ChromeOptions()
-        for option in option_list:
+        for option in dict.fromkeys(self.default_option_list + self._download_options):
             options.add_argument(option)
-            
-        # Add download options if configured
-        if self._download_options:
-            for option in self._download_options:
-                options.add_argument(option)
-            
-        if additional_options:
-            for option in additional_options:
-                options.add_argument(option)
-        
-        # Set up network logging
-        options.set_capability("goog:loggingPrefs", {"performance": "ALL"})
         
         # Set up default preferences
         prefs = {
             'profile.default_content_setting_values': {
                 'cookies': 2,  # 2 = block cookies
+                'images': 2 if self.block_images else 1,  # 2 = block images
                 'plugins': 2,  # 2 = block plugins
                 'popups': 2,  # 2 = block popups
                 'geolocation': 2,  # 2 = block geolocation
@@ -178,9 +530,6 @@ class WebDriver:
             },
             'profile.block_third_party_cookies': True,
             'profile.default_content_settings.popups': 0,
-            'disk-cache-size': 4096,
-            'history.clear_on_exit': True,
-            'browser.cache.disk.enable': False,
             'browser.cache.memory.enable': False,
             'browser.cache.offline.enable': False,
             'network.cookie.lifetimePolicy': 2
@@ -189,38 +538,237 @@ class WebDriver:
         # Merge download preferences if configured
         if self._download_prefs:
             prefs.update(self._download_prefs)
-
-        # Merge additional preferences
-        if additional_prefs:
-            prefs.update(additional_prefs)
         
         options.add_experimental_option("prefs", prefs)
-        
-        # Set up capabilities
-        capabilities = DesiredCapabilities.CHROME.copy()
-        capabilities["timeouts"] = {"pageLoad": 10000, "script": 10000} 
-        
-        # Initialize the driver
-        self.driver = uc.Chrome(options=options)
+        self._base_options = options
+        return options
+
+    def _acquire_profile_slot(self) -> Tuple[Path, IO]:
+        """Reserve a persistent profile directory no other running driver uses.
+
+        Chrome locks a whole user data directory, so concurrent drivers each get
+        their own numbered directory under profile_root.
+
+        Returns:
+            Tuple[Path, IO]: The profile directory and the open lock file reserving it.
+        """
+        self.profile_root.mkdir(parents=True, exist_ok=True)
+        slot = 0
+        while True:
+            lock_file = open(self.profile_root / f'Profile_{slot}.lock', 'a+')
+            try:
+                _try_lock(lock_file)
+            except OSError:
+                lock_file.close()
+                slot += 1
+                continue
+            return self.profile_root / f'Profile_{slot}', lock_file
+
+    def launch_browser(self, **kwargs) -> uc.Chrome:
+        """Launch a new Chrome instance.
+
+        If persistent_profile is set, the browser uses a reserved profile directory
+        whose disk cache survives across runs.
+
+        Args:
+            **kwargs: Arguments passed to build_options.
+
+        Returns:
+            uc.Chrome: The started browser.
+        """
+        import undetected_chromedriver as uc
+
+        options = self.build_options(**kwargs)
+        if not self.persistent_profile:
+            return uc.Chrome(options=options)
+
+        profile_dir, profile_lock = self._acquire_profile_slot()
+        options.add_argument(f'--user-data-dir={profile_dir}')
+        options.add_argument(f'--disk-cache-dir={profile_dir / "Cache"}')
+        options.add_argument(f'--disk-cache-size={self.disk_cache_size}')
+        try:
+            driver = uc.Chrome(options=options)
+        except Exception:
+            profile_lock.close()
+            raise
+        driver._profile_lock = profile_lock
+        return driver
+
+    def create_pool(self, pool_size: int = 2, max_uses: int = 50, **kwargs) -> BrowserPool:
+        """Create a pool of pre-warmed browsers launched with this instance's settings.
+
+        Args:
+            pool_size (int, optional): Number of browsers kept in the pool. Defaults to 2.
+            max_uses (int, optional): Number of jobs after which a browser is replaced. Defaults to 50.
+            **kwargs: Arguments passed to build_options.
+
+        Returns:
+            BrowserPool: The started pool.
+        """
+        return BrowserPool(lambda: self.launch_browser(**kwargs), pool_size=pool_size, max_uses=max_uses)
+
+    def start_driver(self, 
+                    implicitly_wait_time: int = 0, 
+                    headless: bool = False, 
+                    additional_prefs: Optional[Dict] = None, 
+                    additional_options: Optional[List[str]] = None, 
+                    record_network: bool = False,
+                    pool: Optional[BrowserPool] = None,
+                    **kwargs) -> None:
+        """Initialize and start the Chrome WebDriver with specified options.
+
+        Args:
+            implicitly_wait_time (int, optional): Time every element lookup waits for elements to be present.
+                Defaults to 0; use wait_for at the points that need to wait instead.
+            headless (bool, optional): Whether to run browser in headless mode. Defaults to False.
+            additional_prefs (Dict, optional): Additional Chrome preferences. Defaults to None.
+            additional_options (List[str], optional): Additional Chrome options. Defaults to None.
+            record_network (bool, optional): Whether to record the performance log read by
+                get_network_log. Defaults to False.
+            pool (BrowserPool, optional): Pool to take a pre-warmed browser from instead of
+                launching one. Its browsers keep the options they were started with. Defaults to None.
+            **kwargs: Additional arguments to pass to ChromeOptions.
+        """
+        logger.info('Starting Web Driver')
+
+        # Take a browser from the pool or launch a new one
+        self._pool = pool
+        if pool is not None:
+            self.driver = pool.acquire()
+        else:
+            self.driver = self.launch_browser(
+                headless=headless,
+                additional_prefs=additional_prefs,
+                additional_options=additional_options,
+                record_network=record_network,
+                **kwargs
+            )
         self.driver.implicitly_wait(implicitly_wait_time)
+        self._bytes_received = 0
+        self.set_download_behavior()
         logger.debug('Started Web Driver')
 
+    def set_download_behavior(self) -> None:
+        """Point the running browser's downloads at download_dir through CDP.
+
+        Preferences are only read at launch and a persistent profile may hold an
+        older download folder, so the folder is also set on the live browser.
+        File names are kept, and completion is still tracked from the events on
+        the download directory.
+        """
+        if not self.download_dir:
+            return
+        self.driver.execute_cdp_cmd('Browser.setDownloadBehavior', {
+            'behavior': 'allow',
+            'downloadPath': str(self.download_dir)
+        })
+
+    @property
+    def cdp_endpoint(self) -> Optional[str]:
+        """Host and port of the running browser's DevTools endpoint.
+
+        Other WebDriver instances can pass it to attach_to_cdp to share the browser.
+        uc already starts Chrome with --remote-debugging-port on a free port.
+        """
+        if self.driver is None:
+            return None
+        return self.driver.options.debugger_address
+
+    def attach_to_cdp(self, endpoint: str, implicitly_wait_time: int = 0) -> None:
+        """Attach to a browser started by another WebDriver and work in a new tab of it.
+
+        Sharing one browser lets several workers reuse its network and storage
+        processes instead of each launching a full Chrome.
+
+        Args:
+            endpoint (str): DevTools endpoint of the browser, as returned by cdp_endpoint.
+            implicitly_wait_time (int, optional): Time every element lookup waits for elements to be present. Defaults to 0.
+        """
+        from selenium import webdriver
+
+        logger.info(f'Attaching Web Driver to {endpoint}')
+        options = webdriver.ChromeOptions()
+        options.debugger_address = endpoint
+        self.driver = webdriver.Chrome(options=options)
+        self.driver.implicitly_wait(implicitly_wait_time)
+        self._attached_target_id = self.open_and_switch_tab()
+
+    def _current_target_id(self) -> str:
+        """Get the DevTools target id of the current tab."""
+        return self.driver.current_window_handle.removeprefix('CDwindow-')
+
+    def wait_for(self, locator: Tuple[str, str], timeout: float = 5):
+        """Wait until an element is present, returning as soon as it is found.
+
+        Args:
+            locator (Tuple[str, str]): Locator of the element, e.g. (By.TAG_NAME, "a").
+            timeout (float, optional): Maximum time to wait in seconds. Defaults to 5.
+
+        Returns:
+            WebElement: The first matching element.
+
+        Raises:
+            TimeoutException: If no matching element appears within the timeout.
+        """
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        return WebDriverWait(self.driver, timeout, poll_frequency=0.1).until(
+            EC.presence_of_element_located(locator)
+        )
+
     def enable_developer_tools(self) -> None:
         """Enable Chrome DevTools Protocol for network monitoring."""
         self.driver.execute_cdp_cmd('Network.enable', {})
+        self.disable_service_workers()
+
+    def disable_service_workers(self) -> None:
+        """Bypass service workers for network requests and stop the running ones.
+
+        Service workers keep the browser busy after load and add their own traffic
+        to the network log.
+        """
+        self.driver.execute_cdp_cmd('Network.setBypassServiceWorker', {'bypass': True})
+        self.driver.execute_cdp_cmd('ServiceWorker.enable', {})
+        self.driver.execute_cdp_cmd('ServiceWorker.stopAllWorkers', {})
+        # Disable again so the domain does not keep reporting worker updates
+        self.driver.execute_cdp_cmd('ServiceWorker.disable', {})
+
+    def enable_network_recording(self,
+                                 max_total_buffer_size: int = 10 * 1024 * 1024,
+                                 max_resource_buffer_size: int = 5 * 1024 * 1024,
+                                 max_post_data_size: int = 65536) -> None:
+        """Enable the CDP Network domain with bounded buffers for response data.
+
+        Args:
+            max_total_buffer_size (int, optional): Buffer size in bytes for all response bodies. Defaults to 10 MB.
+            max_resource_buffer_size (int, optional): Buffer size in bytes per resource. Defaults to 5 MB.
+            max_post_data_size (int, optional): Longest post body in bytes kept with a request. Defaults to 64 KB.
+        """
+        self.driver.execute_cdp_cmd('Network.enable', {
+            'maxTotalBufferSize': max_total_buffer_size,
+            'maxResourceBufferSize': max_resource_buffer_size,
+            'maxPostDataSize': max_post_data_size
+        })
 
     def prevent_file_extension_fetch(self, urls: Optional[List[str]] = None) -> None:
         """Block specific URLs and file types from loading.
 
+        Images are blocked at launch when block_images is set, so the patterns
+        only need to cover the remaining resource types and hosts.
+
         Args:
             urls (List[str], optional): List of URLs and file patterns to block. 
                                       If None, uses default_blocked_urls.
         """
-        urls_to_block = urls if urls is not None else self.default_blocked_urls
+        urls_to_block = list(urls if urls is not None else self.default_blocked_urls)
         self.driver.execute_cdp_cmd('Network.setBlockedURLs', {"urls": urls_to_block})
         
     def allow_file_extension_fetch(self) -> None:
-        """Remove all URL blocking rules."""
+        """Remove all URL blocking rules.
+
+        Images stay blocked when the browser was launched with block_images set.
+        """
         self.driver.execute_cdp_cmd('Network.setBlockedURLs', {"urls": []})
 
     def set_headers(self, headers: Dict[str, str]) -> None:
@@ -233,23 +781,50 @@ class WebDriver:
         self.driver.execute_cdp_cmd('Network.setExtraHTTPHeaders', {'headers': headers})
 
     def quit_driver(self) -> None:
-        """Safely close the browser and clean up resources."""
+        """Safely close the browser and clean up resources.
+
+        A browser taken from a pool is returned to it instead of being closed, and a
+        driver attached to a shared browser only closes its own tab.
+        """
         logger.debug('Closing Web Driver')
+        if self._attached_target_id is not None:
+            try:
+                self.driver.execute_cdp_cmd('Target.closeTarget', {'targetId': self._attached_target_id})
+                # The driver did not launch the browser, so quitting only detaches from it
+                self.driver.quit()
+            except Exception as e:
+                logger.debug(f'Error detaching from shared browser : {e}')
+            self.driver = None
+            self._attached_target_id = None
+            return
+        if self._pool is not None:
+            self._pool.release(self.driver, failed=not self.check_driver_exists(self.driver))
+            self.driver = None
+            self._pool = None
+            return
         try:
-            self.driver.quit()
+            _close_browser(self.driver)
         except Exception:
-            subprocess.run('killall chrome', shell=True)
-            subprocess.run('killall chromedriver', shell=True)
+            _kill_browser_processes(self.driver)
         
     def close_tab(self) -> None:
         """Close the current tab and switch to the last remaining tab."""
-        self.driver.close()
+        self.driver.execute_cdp_cmd('Target.closeTarget', {'targetId': self._current_target_id()})
         self.driver.switch_to.window(self.driver.window_handles[-1])
         
-    def open_and_switch_tab(self) -> None:
-        """Open a new tab and switch to it."""
-        self.driver.execute_script(f"window.open('', '_blank');")
-        self.driver.switch_to.window(self.driver.window_handles[-1])
+    def open_and_switch_tab(self) -> str:
+        """Open a new tab and switch to it.
+
+        Returns:
+            str: DevTools target id of the new tab.
+        """
+        target_id = self.driver.execute_cdp_cmd('Target.createTarget', {'url': 'about:blank'})['targetId']
+        handle = next(
+            (handle for handle in self.driver.window_handles if handle.removeprefix('CDwindow-') == target_id),
+            self.driver.window_handles[-1]
+        )
+        self.driver.switch_to.window(handle)
+        return target_id
         
     def get_network_log(self) -> List[Dict]:
         """Get network performance logs from the browser.
@@ -258,17 +833,73 @@ class WebDriver:
             List[Dict]: List of network log entries.
 
         Note:
-            Waits for page to be fully loaded before collecting logs.
-        """
-        fully_rendered = False
-        tries = 0
-        while not fully_rendered and tries <= 20:
-            if self.driver.execute_script("return document.readyState") == "complete":
-                fully_rendered = True
-            time.sleep(0.5)
-            tries += 1
+            Waits for page to be fully loaded before collecting logs. The driver must
+            have been started with record_network=True.
+        """
+        self.wait_for_page_load()
         return self.driver.get_log("performance")
-    
+
+    def wait_for_page_load(self, timeout: int = 10) -> bool:
+        """Wait for the load event of the current page.
+
+        The wait runs as an async script that resolves on the page's load event,
+        so it returns as soon as the page finishes loading instead of polling.
+        If the page navigates away while waiting, the script is lost and the rest
+        of the time is spent polling document.readyState with backoff.
+
+        Args:
+            timeout (int, optional): Maximum time to wait in seconds. Defaults to 10.
+
+        Returns:
+            bool: True if the page loaded, False if timed out.
+        """
+        from selenium.common.exceptions import TimeoutException, WebDriverException
+
+        deadline = time.perf_counter() + timeout
+        self.driver.set_script_timeout(timeout)
+        try:
+            return self.driver.execute_async_script(
+                "const done = arguments[arguments.length - 1];"
+                "if (document.readyState === 'complete') { done(true); }"
+                "else { window.addEventListener('load', () => done(true), {once: true}); }"
+            )
+        except TimeoutException:
+            logger.debug(f'Page did not finish loading within {timeout}s')
+            return False
+        except WebDriverException as e:
+            logger.debug(f'Load event wait interrupted, polling instead : {e}')
+
+        # Poll from 10ms, doubling up to 200ms, until the deadline
+        delay = 0.01
+        while time.perf_counter() < deadline:
+            try:
+                if self.driver.execute_script("return document.readyState") == "complete":
+                    return True
+            except WebDriverException:
+                pass
+            time.sleep(min(delay, max(deadline - time.perf_counter(), 0)))
+            delay = min(delay * 2, 0.2)
+        logger.debug(f'Page did not finish loading within {timeout}s')
+        return False
+
+    @staticmethod
+    def _loading_finished_bytes(logs: List[Dict]) -> float:
+        """Sum the encoded bytes of the loadingFinished events in network logs.
+
+        Args:
+            logs (List[Dict]): List of network log entries.
+
+        Returns:
+            float: Total encoded data length in bytes.
+        """
+        # Read the one number needed straight from the serialized message instead of parsing it
+        total_bytes = 0.0
+        for network_log in logs:
+            match = _LOADING_FINISHED_RE.search(network_log['message'])
+            if match:
+                total_bytes += float(match.group(1))
+        return total_bytes
+
     @staticmethod
     def get_data_usage(logs: List[Dict]) -> float:
         """Calculate total data usage from network logs.
@@ -279,12 +910,20 @@ class WebDriver:
         Returns:
             float: Total data usage in megabytes.
         """
-        total_mb = 0
-        for network_log in logs:
-            network_message = json.loads(network_log['message'])['message']
-            if "Network.loadingFinished" == network_message['method']:
-                total_mb += network_message["params"]["encodedDataLength"]/1024/1024
-        return total_mb
+        return WebDriver._loading_finished_bytes(logs) / 1024 / 1024
+
+    def update_data_usage(self) -> float:
+        """Add the data received since the last call to the running total.
+
+        chromedriver clears its performance log each time it is read, so every call
+        scans only new entries and the log never has to hold a whole session.
+        The driver must have been started with record_network=True.
+
+        Returns:
+            float: Total data usage since the driver started, in megabytes.
+        """
+        self._bytes_received += self._loading_finished_bytes(self.driver.get_log("performance"))
+        return self._bytes_received / 1048576.0
 
     @staticmethod
     def check_driver_exists(driver) -> bool:
@@ -306,9 +945,12 @@ class WebDriver:
             return False
     
     @staticmethod
+    @functools.lru_cache(maxsize=4096)
     def normalize_url(url: Optional[str]) -> Optional[str]:
         """Normalize a URL by ensuring proper formatting.
 
+        Results are cached since the same few URLs are normalized repeatedly.
+
         Args:
             url (Optional[str]): URL to normalize.
 
@@ -333,11 +975,39 @@ class WebDriver:
     def set_window_to_desired(self, resolution: str) -> None:
         """Set browser window size to specified resolution.
 
+        A headless browser has no OS window to resize, so its viewport is set
+        directly through CDP instead.
+
         Args:
             resolution (str): Resolution in format "width,height".
         """
         width, height = map(int, resolution.split(','))
-        self.driver.set_window_size(width=width, height=height)
+        if getattr(getattr(self.driver, 'options', None), 'headless', False):
+            self.driver.execute_cdp_cmd('Emulation.setDeviceMetricsOverride', {
+                'width': width,
+                'height': height,
+                'deviceScaleFactor': 1,
+                'mobile': False
+            })
+        else:
+            self.driver.set_window_size(width=width, height=height)
+
+    def wait_for_download_start(self, timeout: int = 10) -> bool:
+        """Wait for a download to appear in the download directory.
+
+        Navigating to a file download never fires a page load event, so the start
+        is detected by the first file event in the download directory since the
+        last call to download_file.
+
+        Args:
+            timeout (int, optional): Maximum time to wait in seconds. Defaults to 10.
+
+        Returns:
+            bool: True if the download started, False if timed out.
+        """
+        if not self.download_dir:
+            raise ValueError("Download directory not set")
+        return self._download_events.started.wait(timeout)
 
     def wait_for_download_complete(self, timeout: int = 300) -> bool:
         """Wait for a download to complete.
@@ -349,23 +1019,12 @@ class WebDriver:
             bool: True if download completed, False if timed out.
 
         Note:
-            Monitors the download directory for .crdownload files.
+            Waits for file system events removing the last .crdownload file rather
+            than listing the download directory.
         """
         if not self.download_dir:
             raise ValueError("Download directory not set")
-
-        seconds = 0
-        dl_wait = True
-        while dl_wait and seconds < timeout:
-            time.sleep(1)
-            dl_wait = False
-            files = os.listdir(self.download_dir)
-            for fname in files:
-                if fname.endswith('.crdownload'):
-                    dl_wait = True
-            seconds += 1
-        return seconds < timeout
-    
+        return self._download_events.done.wait(timeout)
 
     def download_file(self, url: str) -> bool:
         """Download a file using Selenium.
@@ -380,9 +1039,12 @@ class WebDriver:
             Waits for the download to complete before returning.
         """
         try:
-            # Navigate to the download URL
+            # Navigate to the download URL and wait for the download to start
+            self._download_events.started.clear()
             self.driver.get(url)
-            time.sleep(10)  # Wait for download to start
+            if not self.wait_for_download_start():
+                logger.warning(f"Download did not start within 10s for {url}")
+                return False
             
             # Wait for download to complete
             if not self.wait_for_download_complete():
@@ -394,4 +1056,51 @@ class WebDriver:
             
         except Exception as e:
             logger.error(f"Error downloading {url}: {str(e)}")
-            return False
\ No newline at end of file
+            return False
+
+    def download_files(self, urls: List[str], timeout: int = 300) -> List[bool]:
+        """Download several files at once, each started from its own tab.
+
+        A Selenium session cannot be driven from several threads, so the downloads
+        are started one after another in separate tabs. They then run in parallel
+        inside the browser while this waits for all of them together.
+
+        Args:
+            urls (List[str]): URLs of the files to download.
+            timeout (int, optional): Maximum time to wait for all downloads in seconds. Defaults to 300.
+
+        Returns:
+            List[bool]: Whether each download was successful, in the order of urls.
+        """
+        original_handle = self.driver.current_window_handle
+        target_ids = []
+        started = []
+        for url in urls:
+            try:
+                target_ids.append(self.open_and_switch_tab())
+                self._download_events.started.clear()
+                self.driver.get(url)
+                if not self.wait_for_download_start():
+                    logger.warning(f"Download did not start within 10s for {url}")
+                    started.append(False)
+                else:
+                    started.append(True)
+            except Exception as e:
+                logger.error(f"Error downloading {url}: {str(e)}")
+                started.append(False)
+
+        try:
+            completed = self.wait_for_download_complete(timeout)
+            if not completed:
+                logger.error(f"Downloads timed out for {len(urls)} files")
+        finally:
+            # Close the download tabs and go back to the tab we started from
+            for target_id in target_ids:
+                try:
+                    self.driver.execute_cdp_cmd('Target.closeTarget', {'targetId': target_id})
+                except Exception as e:
+                    logger.debug(f'Error closing download tab : {e}')
+            self.driver.switch_to.window(original_handle)
+
+        logger.info(f"Downloads completed for {sum(started)} of {len(urls)} files")
+        return [is_started and completed for is_started in started]
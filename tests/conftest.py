@@ -0,0 +1,20 @@
+import os
+import sys
+import types
+
+# The scripts import their helpers as `lib.*`, relative to the scripts folder
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+
+# lib/config.py is created locally from config.example.py and is not checked in
+if "lib.config" not in sys.modules:
+    try:
+        import lib.config  # noqa: F401
+    except ImportError:
+        config_module = types.ModuleType("lib.config")
+
+        class Config:
+            GEOLOCATION_DB_API_KEY = ''
+            SEC_USER_AGENT = 'Test Suite test@example.com'
+
+        config_module.Config = Config
+        sys.modules["lib.config"] = config_module
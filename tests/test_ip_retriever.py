@@ -0,0 +1,96 @@
+import asyncio
+import time
+
+import polars as pl
+import pytest
+
+import lib.ip_retriever as ip_retriever
+
+
+@pytest.fixture
+def retriever(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    pl.DataFrame({
+        "ip_from": [0], "ip_to": [2**32 - 1], "country_code": ["-"], "country_name": ["-"]
+    }).write_parquet("ip2_location.parquet")
+    return ip_retriever.IPRetriever()
+
+
+def test_cached_lookups_expire_after_their_ttl(retriever):
+    retriever._cache_locations([(1, {"country_code": "US"}), (2, {})])
+    assert retriever._get_cached_location(1) == {"country_code": "US"}
+    assert retriever._get_cached_location(2) == {}
+    assert retriever._get_cached_location(3) is None
+
+    # Failed lookups expire after the short TTL, successful ones after the long one
+    retriever.ip_cache.execute("UPDATE ip_cache SET ts = ts - ?", (retriever.IP_CACHE_FAILURE_TTL + 1,))
+    assert retriever._get_cached_location(1) == {"country_code": "US"}
+    assert retriever._get_cached_location(2) is None
+
+    retriever.ip_cache.execute("UPDATE ip_cache SET ts = ts - ?", (retriever.IP_CACHE_TTL,))
+    assert retriever._get_cached_location(1) is None
+
+
+def test_token_bucket_allows_a_burst_then_the_refill_rate():
+    async def acquire_times() -> list:
+        bucket = ip_retriever._TokenBucket(max_call_count=2, per_seconds=0.2)
+        start = time.monotonic()
+        times = []
+        for _ in range(3):
+            await bucket.acquire()
+            times.append(time.monotonic() - start)
+        return times
+
+    times = asyncio.run(acquire_times())
+    assert times[1] < 0.05
+    assert times[2] >= 0.09
+
+
+class _FakeResponse:
+    def __init__(self, status: int, headers: dict = None, data: dict = None):
+        self.status = status
+        self.headers = headers or {}
+        self._data = data
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def json(self, content_type=None):
+        return self._data
+
+
+class _FakeSession:
+    def __init__(self, responses: list):
+        self.responses = list(responses)
+
+    def get(self, url: str) -> _FakeResponse:
+        return self.responses.pop(0)
+
+
+@pytest.mark.parametrize("headers, expected_sleeps", [
+    ({}, [1]),
+    ({"Retry-After": "7"}, [7]),
+])
+def test_rate_limited_lookups_wait_before_retrying(retriever, monkeypatch, headers, expected_sleeps):
+    sleeps = []
+
+    async def fake_sleep(delay):
+        sleeps.append(delay)
+
+    monkeypatch.setattr(ip_retriever.asyncio, "sleep", fake_sleep)
+    session = _FakeSession([
+        _FakeResponse(429, headers=headers),
+        _FakeResponse(200, data={"country_code": "US", "country_name": "United States", "latitude": "Not found"}),
+    ])
+
+    async def lookup() -> dict:
+        bucket = ip_retriever._TokenBucket(max_call_count=10, per_seconds=1)
+        return await retriever.get_ip_location_from_geolocation_db(session, bucket, "192.168.1.0")
+
+    result = asyncio.run(lookup())
+    assert result["country_code"] == "US"
+    assert result["latitude"] is None
+    assert sleeps == expected_sleeps
@@ -0,0 +1,148 @@
+import datetime
+import zipfile
+
+import polars as pl
+import pytest
+
+import lib.sec_edgar as sec_edgar
+
+
+LOG_HEADER = "ip,date,time,zone,cik,accession,extention,code,size,idx,norefer,noagent,find,crawler,browser"
+
+
+class StubIPRetriever:
+    """IPRetriever stand-in that maps every /24 network to a fixed location."""
+
+    def get_ip_from_ip2location(self, ip_df: pl.LazyFrame) -> pl.LazyFrame:
+        return ip_df\
+            .drop_nulls("cleaned_ip_int")\
+            .select(
+                pl.col("cleaned_ip_int").cast(pl.UInt32).alias("ip_from"),
+                pl.col("cleaned_ip_int").cast(pl.UInt32).alias("ip_to"),
+                pl.lit("US").alias("country_code"),
+                pl.lit("United States of America").alias("country_name")
+            )\
+            .unique()
+
+
+def _log_row(ip: str, time: str, code: float = 200.0, idx: float = 0.0) -> str:
+    return f"{ip},2024-03-20,{time},0.0,1000.0,0001-24-000001,-index.htm,{code},100.0,{idx},0.0,0.0,10.0,0.0,"
+
+
+def _log_frame(rows: list) -> pl.DataFrame:
+    """Build a converted log frame from (ip, time, code, idx) tuples."""
+    return pl.DataFrame(
+        {
+            "code": [float(row[2]) for row in rows],
+            "idx": [float(row[3]) for row in rows],
+            "crawler": [0.0] * len(rows),
+            "ip": [row[0] for row in rows],
+            "date": ["2024-03-20"] * len(rows),
+            "time": [row[1] for row in rows],
+            "cik": [1000.0 + i for i in range(len(rows))],
+            "accession": ["0001-24-000001"] * len(rows),
+        }
+    )
+
+
+@pytest.fixture
+def edgar(tmp_path, monkeypatch):
+    monkeypatch.setattr(sec_edgar, "IPRetriever", StubIPRetriever)
+    return sec_edgar.SECEdgar(base_dir=str(tmp_path))
+
+
+def test_convert_to_parquet_reads_the_csv_in_the_zip(edgar, tmp_path):
+    zip_path = tmp_path / "log20240320.zip"
+    parquet_path = tmp_path / "converted.parquet"
+    with zipfile.ZipFile(zip_path, "w") as zip_file:
+        zip_file.writestr("log20240320.csv", "\n".join([LOG_HEADER, _log_row("192.168.1.abc", "00:01:00")]) + "\n")
+
+    edgar._SECEdgar__convert_to_parquet(str(zip_path), str(parquet_path))
+
+    converted = pl.read_parquet(parquet_path)
+    assert converted.columns[:6] == sec_edgar.SECEdgar.LOG_LEADING_COLUMNS
+    assert converted.get_column("ip").to_list() == ["192.168.1.abc"]
+    assert converted.schema["cik"] == pl.Float64
+    # The extracted CSV does not outlive the conversion
+    assert list((tmp_path / "tmp").glob("**/*.csv")) == []
+
+
+def test_cleaning_data_drops_bots_and_cleans_ips(edgar, tmp_path):
+    read_path = tmp_path / "converted.parquet"
+    write_path = tmp_path / "no_bots.parquet"
+    rows = [("10.0.0.abc", f"00:00:{second:02d}", 200, 0) for second in range(30)]
+    rows += [
+        ("192.168.1.abc", "00:01:00", 200, 0),
+        ("172.16.5.xyz", "00:02:00", 200, 0),
+        ("172.16.5.xyz", "00:03:00", 404, 0),
+        ("172.16.5.xyz", "00:04:00", 200, 1),
+        ("300.16.5.xyz", "00:05:00", 200, 0),
+    ]
+    _log_frame(rows).write_parquet(read_path)
+
+    edgar.cleaning_data(read_path=str(read_path), write_path=str(write_path))
+
+    cleaned = pl.read_parquet(write_path).sort("ip")
+    assert cleaned.get_column("ip").to_list() == ["172.16.5.xyz", "192.168.1.abc", "300.16.5.xyz"]
+    assert cleaned.get_column("cleaned_ip").to_list() == ["172.16.5.0", "192.168.1.0", None]
+    assert cleaned.get_column("cleaned_ip_int").to_list() == [
+        172 * 2**24 + 16 * 2**16 + 5 * 2**8,
+        192 * 2**24 + 168 * 2**16 + 1 * 2**8,
+        None
+    ]
+    assert cleaned.get_column("datetime").to_list()[0] == datetime.datetime(2024, 3, 20, 0, 2)
+    assert cleaned.schema["ip"] == pl.Utf8
+
+
+def test_extract_ip_joins_locations_on_the_integer_key(edgar, tmp_path):
+    read_path = tmp_path / "no_bots.parquet"
+    write_path = tmp_path / "ip_enriched.parquet"
+    pl.DataFrame({
+        "ip": ["192.168.1.abc", "192.168.1.xyz", "300.16.5.xyz"],
+        "cleaned_ip": ["192.168.1.0", "192.168.1.0", None],
+        "cleaned_ip_int": [192 * 2**24 + 168 * 2**16 + 1 * 2**8] * 2 + [None],
+    }).write_parquet(read_path)
+
+    edgar._SECEdgar__extract_ip(read_path=str(read_path), write_path=str(write_path))
+
+    enriched = pl.read_parquet(write_path).sort("ip")
+    assert enriched.columns[:3] == ["ip", "cleaned_ip", "cleaned_ip_int"]
+    assert "ip_from" not in enriched.columns
+    assert enriched.schema["cleaned_ip_int"] == pl.Int64
+    assert enriched.get_column("country_name").to_list() == ["United States of America", "United States of America", None]
+
+
+def test_clean_country_names_keeps_unmapped_names(edgar, tmp_path, caplog, monkeypatch):
+    monkeypatch.setattr(sec_edgar.logger, "propagate", True)
+    read_path = tmp_path / "ip_enriched.parquet"
+    write_path = tmp_path / "output" / "cleaned.parquet"
+    pl.DataFrame({"country_name": ["USA", "Nowhereland", None]}).write_parquet(read_path)
+
+    edgar._SECEdgar__clean_country_names(read_path=str(read_path), write_path=str(write_path))
+
+    cleaned = pl.read_parquet(write_path)
+    assert cleaned.get_column("country_name").to_list() == ["United States", "Nowhereland", None]
+    assert "Could not convert country name: Nowhereland" in caplog.text
+    assert "Could not convert country name: USA" not in caplog.text
+
+
+def test_process_dates_skips_dates_without_a_log(edgar, tmp_path, monkeypatch, caplog):
+    monkeypatch.setattr(sec_edgar.logger, "propagate", True)
+    monkeypatch.setattr(sec_edgar.SECEdgar, "USER_AGENT", "Test Suite test@example.com")
+    with zipfile.ZipFile(tmp_path / "tmp" / "downloads" / "log20240320.zip", "w") as zip_file:
+        zip_file.writestr("log20240320.csv", "\n".join([LOG_HEADER, _log_row("192.168.1.abc", "00:01:00")]) + "\n")
+    # The index lists neither date; 2024-03-20 is already downloaded
+    monkeypatch.setattr(sec_edgar, "_fetch_page", lambda url, user_agent, timeout: "")
+
+    edgar.process_dates(dates=["2024-03-19", "2024-03-20"])
+
+    assert "Skipping 2024-03-19: No log file found for date 2024-03-19" in caplog.text
+    output = pl.read_parquet(tmp_path / "output" / "**" / "*.parquet", hive_partitioning=True)
+    assert output.get_column("country_name").to_list() == ["United States"]
+
+
+def test_reading_the_log_index_requires_a_user_agent(edgar, monkeypatch):
+    monkeypatch.setattr(sec_edgar.SECEdgar, "USER_AGENT", "")
+
+    with pytest.raises(RuntimeError, match="SEC_USER_AGENT"):
+        edgar.obtain_edgar_log_links(url="https://www.sec.gov/files/edgar2024.html")
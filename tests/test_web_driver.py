@@ -0,0 +1,119 @@
+import json
+import threading
+
+import pytest
+from watchdog.events import FileCreatedEvent, FileDeletedEvent, FileMovedEvent
+
+import lib.web_driver as web_driver
+
+
+def test_download_handler_waits_for_the_last_partial_file():
+    handler = web_driver._DownloadEventHandler()
+    assert handler.done.is_set() and not handler.started.is_set()
+
+    handler.on_created(FileCreatedEvent("/downloads/a.zip.crdownload"))
+    handler.on_created(FileCreatedEvent("/downloads/b.zip.crdownload"))
+    assert handler.started.is_set() and not handler.done.is_set()
+
+    handler.on_moved(FileMovedEvent("/downloads/a.zip.crdownload", "/downloads/a.zip"))
+    assert not handler.done.is_set()
+    handler.on_deleted(FileDeletedEvent("/downloads/b.zip.crdownload"))
+    assert handler.done.is_set()
+
+
+def test_download_handler_tracks_renames_between_partial_files():
+    handler = web_driver._DownloadEventHandler()
+    handler.on_created(FileCreatedEvent("/downloads/Unconfirmed 1.crdownload"))
+    handler.on_moved(FileMovedEvent("/downloads/Unconfirmed 1.crdownload", "/downloads/a.zip.crdownload"))
+    assert not handler.done.is_set()
+    handler.on_moved(FileMovedEvent("/downloads/a.zip.crdownload", "/downloads/a.zip"))
+    assert handler.done.is_set()
+
+
+def test_download_handler_counts_a_direct_file_as_started():
+    handler = web_driver._DownloadEventHandler()
+    handler.on_created(FileCreatedEvent("/downloads/a.zip"))
+    assert handler.started.is_set() and handler.done.is_set()
+
+
+def _log_entry(method: str, params: dict) -> dict:
+    return {"message": json.dumps({"message": {"method": method, "params": params}}, separators=(",", ":"))}
+
+
+def test_loading_finished_bytes_sums_only_loading_finished_events():
+    logs = [
+        _log_entry("Network.loadingFinished", {"requestId": "1", "timestamp": 1.5, "encodedDataLength": 1024}),
+        _log_entry("Network.dataReceived", {"requestId": "1", "encodedDataLength": 4096}),
+        _log_entry("Network.loadingFinished", {"requestId": "2", "encodedDataLength": 512.5}),
+    ]
+    assert web_driver.WebDriver._loading_finished_bytes(logs) == 1536.5
+    assert web_driver.WebDriver.get_data_usage(logs) == pytest.approx(1536.5 / 1024 / 1024)
+
+
+def test_browser_pool_raises_when_browsers_fail_to_start():
+    def launcher():
+        raise RuntimeError("session not created: This version of ChromeDriver only supports Chrome version 120")
+
+    with pytest.raises(RuntimeError, match="session not created"):
+        web_driver.BrowserPool(launcher, pool_size=2)
+
+
+class _FakeBrowser:
+    current_url = "https://www.sec.gov/files/edgar2024.html"
+
+    def __init__(self):
+        self.commands = []
+
+    def execute_cdp_cmd(self, cmd: str, params: dict) -> dict:
+        self.commands.append((cmd, params))
+        return {}
+
+    def quit(self) -> None:
+        pass
+
+
+def test_browser_pool_fails_acquire_once_no_browser_is_left():
+    launches = []
+
+    def launcher():
+        if launches:
+            raise RuntimeError("Chrome failed to start")
+        launches.append(_FakeBrowser())
+        return launches[-1]
+
+    pool = web_driver.BrowserPool(launcher, pool_size=1)
+    browser = pool.acquire(timeout=1)
+    waiter_errors = []
+
+    def wait_for_browser():
+        try:
+            pool.acquire(timeout=5)
+        except RuntimeError as e:
+            waiter_errors.append(e)
+
+    waiter = threading.Thread(target=wait_for_browser)
+    waiter.start()
+    pool.release(browser, failed=True)
+    waiter.join(timeout=5)
+
+    assert not waiter.is_alive()
+    assert len(waiter_errors) == 1
+    with pytest.raises(RuntimeError, match="no running browsers"):
+        pool.acquire(timeout=1)
+
+
+def test_browser_pool_release_keeps_the_http_cache():
+    browser = _FakeBrowser()
+    pool = web_driver.BrowserPool(lambda: browser, pool_size=1)
+    pool.release(pool.acquire(timeout=1))
+
+    commands = [cmd for cmd, _ in browser.commands]
+    assert commands == ["Network.clearBrowserCookies", "Storage.clearDataForOrigin"]
+    assert browser.commands[1][1]["origin"] == "https://www.sec.gov"
+    assert "cache" not in browser.commands[1][1]["storageTypes"].split(",")
+    assert pool.acquire(timeout=1) is browser
+
+
+def test_blocked_urls_keep_both_suffix_forms():
+    patterns = web_driver._dedupe_blocked_urls(["*.ico", "*.ico?*", "*.ico", "*/gtm.js?*"])
+    assert patterns == ("*.ico", "*.ico?*", "*/gtm.js?*")